@@ -15,10 +15,15 @@ def load_user(id):
     return User.query.get(int(id))
 
 from routes import *
+import seeding
 
 if __name__ == '__main__':
     with app.app_context():
         db.create_all()
+        from models import create_missing_indexes
+        create_missing_indexes()
+        from search import init_search
+        init_search()
         # Seed data if empty
         if not Product.query.first():
             from routes import seed_products
@@ -4,3 +4,5 @@ class Config:
     SECRET_KEY = os.environ.get('SECRET_KEY') or 'dev-secret-key-123'
     SQLALCHEMY_DATABASE_URI = os.environ.get('DATABASE_URL') or 'sqlite:///ecommerce.db'
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+    # Exposes POST /__test__/seed; never enable outside test environments
+    ENABLE_TEST_SEEDING = os.environ.get('ENABLE_TEST_SEEDING') == '1'
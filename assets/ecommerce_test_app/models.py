@@ -17,7 +17,7 @@ class Product(db.Model):
     name = db.Column(db.String(100), nullable=False)
     price = db.Column(db.Float, nullable=False)
     image_url = db.Column(db.String(500), nullable=False)
-    category = db.Column(db.String(50), default='General')
+    category = db.Column(db.String(50), default='General', index=True)
     description = db.Column(db.String(500))
 
 class CartItem(db.Model):
@@ -28,6 +28,9 @@ class CartItem(db.Model):
     product = db.relationship('Product')
 
 class Order(db.Model):
+    # Serves the per-user, newest-first keyset pagination of the order history
+    __table_args__ = (db.Index('ix_order_user_id_created_at', 'user_id', 'created_at'),)
+
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
     total_price = db.Column(db.Float, nullable=False)
@@ -36,3 +39,8 @@ class Order(db.Model):
     status = db.Column(db.String(20), default='Pending')
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
 
+def create_missing_indexes():
+    """create_all() skips tables that already exist; adds indexes declared since to older databases."""
+    for table in (Product.__table__, Order.__table__):
+        for index in table.indexes:
+            index.create(db.engine, checkfirst=True)
@@ -0,0 +1,41 @@
+"""Keyset (cursor) pagination helpers.
+
+Instead of OFFSET, each page continues after the sort key of the previous page's
+last row, so a page costs the same index range scan however deep it is. Cursors
+are opaque, URL-safe encodings of that sort key.
+"""
+import json
+import base64
+from typing import Any, Callable, List, NamedTuple, Optional, Sequence
+
+PRODUCTS_PER_PAGE = 8
+ORDERS_PER_PAGE = 20
+
+class Page(NamedTuple):
+    items: List[Any]
+    next_cursor: Optional[str]
+
+def encode_cursor(key: tuple) -> str:
+    return base64.urlsafe_b64encode(json.dumps(list(key)).encode("utf-8")).decode("ascii").rstrip("=")
+
+def decode_cursor(cursor: Optional[str], types: Sequence[Callable[[Any], Any]]) -> Optional[tuple]:
+    """The sort key in a cursor, each element converted with its entry in types (e.g. (float, int)).
+
+    A missing or malformed cursor, or one whose elements don't convert, gives None (first page).
+    """
+    if not cursor:
+        return None
+    try:
+        key = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        if not isinstance(key, list) or len(key) != len(types):
+            return None
+        return tuple(convert(value) for convert, value in zip(types, key))
+    except (TypeError, ValueError, OverflowError):
+        return None
+
+def keyset_page(rows: List[Any], per_page: int, key: Callable[[Any], tuple]) -> Page:
+    """Builds a page from up to per_page + 1 rows; the extra row only signals that more follow."""
+    if len(rows) <= per_page:
+        return Page(rows, None)
+    rows = rows[:per_page]
+    return Page(rows, encode_cursor(key(rows[-1])))
@@ -1,28 +1,34 @@
+from datetime import datetime
 from flask import render_template, flash, redirect, url_for, request
+from sqlalchemy import and_, or_
 from app import app, db
 from models import User, Product, CartItem, Order
 from flask_login import current_user, login_user, logout_user, login_required
 from werkzeug.security import generate_password_hash, check_password_hash
+from search import search_page
+from pagination import PRODUCTS_PER_PAGE, ORDERS_PER_PAGE, decode_cursor, keyset_page
 
 @app.route('/')
 def index():
     search_query = request.args.get('search', '')
     category = request.args.get('category', '')
-    
-    query = Product.query
-    
+    cursor = request.args.get('after')
+
     if search_query:
-        query = query.filter(
-            (Product.name.ilike(f'%{search_query}%')) | 
-            (Product.category.ilike(f'%{search_query}%')) |
-            (Product.description.ilike(f'%{search_query}%'))
-        )
-    
-    if category:
-        query = query.filter(Product.category == category)
-    
-    products = query.all()
-    return render_template('index.html', products=products, search_query=search_query, category=category)
+        # Ranked full-text search (FTS5); falls back to ilike where unavailable
+        page = search_page(search_query, category, cursor=cursor)
+    else:
+        # Keyset pagination on id: every page is one index range scan, however deep
+        query = Product.query
+        if category:
+            query = query.filter(Product.category == category)
+        after = decode_cursor(cursor, (int,))
+        if after:
+            query = query.filter(Product.id > after[0])
+        rows = query.order_by(Product.id).limit(PRODUCTS_PER_PAGE + 1).all()
+        page = keyset_page(rows, PRODUCTS_PER_PAGE, key=lambda product: (product.id,))
+    return render_template('index.html', products=page.items, next_cursor=page.next_cursor,
+                           search_query=search_query, category=category)
 
 @app.route('/login', methods=['GET', 'POST'])
 def login():
@@ -191,8 +197,18 @@ def profile():
 @app.route('/orders')
 @login_required
 def orders():
-    orders = current_user.orders.all()
-    return render_template('orders.html', orders=orders)
+    # Newest first, paged on (created_at, id) through ix_order_user_id_created_at
+    query = current_user.orders
+    after = decode_cursor(request.args.get('after'), (datetime.fromisoformat, int))
+    if after:
+        created_at, order_id = after
+        query = query.filter(or_(
+            Order.created_at < created_at,
+            and_(Order.created_at == created_at, Order.id < order_id),
+        ))
+    rows = query.order_by(Order.created_at.desc(), Order.id.desc()).limit(ORDERS_PER_PAGE + 1).all()
+    page = keyset_page(rows, ORDERS_PER_PAGE, key=lambda order: (order.created_at.isoformat(), order.id))
+    return render_template('orders.html', orders=page.items, next_cursor=page.next_cursor)
 
 def seed_products():
     products = [
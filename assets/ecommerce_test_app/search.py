@@ -0,0 +1,146 @@
+"""Product search backed by an SQLite FTS5 index.
+
+product_fts is an external-content FTS5 table over product(name, category,
+description). Triggers keep it in sync on every insert, update and delete,
+including bulk inserts that bypass the ORM. Databases without FTS5 (or not on
+SQLite) fall back to the original ilike scan.
+"""
+import re
+
+from sqlalchemy import text
+
+from models import db, Product
+from pagination import PRODUCTS_PER_PAGE, Page, decode_cursor, keyset_page
+
+# bm25() column weights: a hit in the name outranks category, which outranks description
+RANK_WEIGHTS = (10.0, 5.0, 1.0)
+
+_SCHEMA = [
+    """CREATE VIRTUAL TABLE IF NOT EXISTS product_fts USING fts5(
+        name, category, description,
+        content='product', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+    )""",
+    """CREATE TRIGGER IF NOT EXISTS product_fts_insert AFTER INSERT ON product BEGIN
+        INSERT INTO product_fts(rowid, name, category, description)
+        VALUES (new.id, new.name, new.category, new.description);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS product_fts_delete AFTER DELETE ON product BEGIN
+        INSERT INTO product_fts(product_fts, rowid, name, category, description)
+        VALUES ('delete', old.id, old.name, old.category, old.description);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS product_fts_update AFTER UPDATE ON product BEGIN
+        INSERT INTO product_fts(product_fts, rowid, name, category, description)
+        VALUES ('delete', old.id, old.name, old.category, old.description);
+        INSERT INTO product_fts(rowid, name, category, description)
+        VALUES (new.id, new.name, new.category, new.description);
+    END""",
+]
+
+_TOKEN = re.compile(r"\w+", re.UNICODE)
+_fts_enabled = {}  # engine url -> bool
+
+def init_search(rebuild: bool = False) -> bool:
+    """Creates the FTS table and triggers if needed and indexes existing products.
+
+    Returns False when FTS5 is unavailable and searches use the ilike fallback.
+    Must run inside an app context.
+    """
+    engine = db.engine
+    if engine.dialect.name != "sqlite":
+        _fts_enabled[str(engine.url)] = False
+        return False
+    try:
+        with engine.begin() as conn:
+            created = not conn.execute(
+                text("SELECT 1 FROM sqlite_master WHERE name = 'product_fts'")
+            ).first()
+            for statement in _SCHEMA:
+                conn.execute(text(statement))
+            conn.execute(text(
+                "INSERT INTO product_fts(product_fts, rank) VALUES ('rank', 'bm25({}, {}, {})')".format(*RANK_WEIGHTS)
+            ))
+            if created or rebuild:
+                # Rows that existed before the triggers did
+                conn.execute(text("INSERT INTO product_fts(product_fts) VALUES ('rebuild')"))
+    except Exception as e:
+        if "fts5" not in str(e).lower():
+            raise
+        _fts_enabled[str(engine.url)] = False
+        return False
+    _fts_enabled[str(engine.url)] = True
+    return True
+
+def _fts_ready() -> bool:
+    key = str(db.engine.url)
+    if key not in _fts_enabled:
+        init_search()
+    return _fts_enabled[key]
+
+def match_expression(query: str) -> str:
+    """Turns user input into an FTS5 query: every word must match as a prefix ("leath jack" finds Leather Jacket)."""
+    return " AND ".join(f'"{token}"*' for token in _TOKEN.findall(query))
+
+def ilike_search(query: str, category: str = ""):
+    """The original full-scan search; kept as fallback and for comparison."""
+    products = Product.query.filter(
+        (Product.name.ilike(f'%{query}%')) |
+        (Product.category.ilike(f'%{query}%')) |
+        (Product.description.ilike(f'%{query}%'))
+    )
+    if category:
+        products = products.filter(Product.category == category)
+    return products
+
+def _fts_hits(expression: str, category: str, limit: int, after: tuple):
+    """(product id, rank) pairs of the matches, best first; after = (rank, id) resumes a previous page."""
+    # Rank inside the FTS table; product is only joined when filtering by category
+    sql = (
+        "SELECT product_fts.rowid, product_fts.rank FROM product_fts"
+        + (" JOIN product ON product.id = product_fts.rowid" if category else "")
+        + " WHERE product_fts MATCH :expression"
+        + (" AND product.category = :category" if category else "")
+        + (" AND (product_fts.rank > :rank OR (product_fts.rank = :rank AND product_fts.rowid > :id))" if after else "")
+        + " ORDER BY product_fts.rank, product_fts.rowid"
+        + (" LIMIT :limit" if limit else "")
+    )
+    params = {"expression": expression}
+    if category:
+        params["category"] = category
+    if after:
+        params["rank"], params["id"] = after
+    if limit:
+        params["limit"] = limit
+    return db.session.execute(text(sql), params).all()
+
+def _products_by_id(ids):
+    products = {product.id: product for product in Product.query.filter(Product.id.in_(ids))} if ids else {}
+    return [products[product_id] for product_id in ids if product_id in products]
+
+def search_products(query: str, category: str = "", limit: int = None):
+    """Products matching the query, best matches first, optionally within one category."""
+    expression = match_expression(query)
+    if not expression or not _fts_ready():
+        return ilike_search(query, category).limit(limit).all()
+    return _products_by_id([product_id for product_id, _ in _fts_hits(expression, category, limit, None)])
+
+def search_page(query: str, category: str = "", per_page: int = PRODUCTS_PER_PAGE, cursor: str = None) -> Page:
+    """One page of search results; pass the returned next_cursor back to get the next one.
+
+    Cursors hold the (rank, id) of the last result, so a page skips earlier
+    results without OFFSET and only per_page + 1 rows are loaded. FTS5 still
+    scores every match of the query on each page, so each page costs about as
+    much as ranking the full result set. The ilike fallback pages by id with
+    rank fixed at 0.
+    """
+    after = decode_cursor(cursor, (float, int))
+    expression = match_expression(query)
+    if not expression or not _fts_ready():
+        products = ilike_search(query, category)
+        if after:
+            products = products.filter(Product.id > after[1])
+        rows = products.order_by(Product.id).limit(per_page + 1).all()
+        return keyset_page(rows, per_page, key=lambda product: (0, product.id))
+
+    page = keyset_page(_fts_hits(expression, category, per_page + 1, after), per_page, key=lambda hit: (hit[1], hit[0]))
+    return Page(_products_by_id([product_id for product_id, _ in page.items]), page.next_cursor)
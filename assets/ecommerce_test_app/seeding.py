@@ -0,0 +1,189 @@
+"""Bulk test-data seeding for load and scale testing.
+
+Rows are generated in batches and written with bulk_insert_mappings, so millions
+of rows take minutes instead of the hours one ORM object (or one HTTP request)
+per row would. Synthetic users all share one cheap password hash.
+
+    flask --app app seed --users 100000 --products 100000 --carts 50000 --orders 500000
+
+With ENABLE_TEST_SEEDING=1 the same is available as POST /__test__/seed with a
+JSON body like {"users": 1000, "orders": 5000}.
+"""
+import time
+import uuid
+import random
+from datetime import datetime, timedelta
+
+import click
+from flask import abort, jsonify, request
+from werkzeug.security import generate_password_hash
+
+from app import app
+from models import db, User, Product, CartItem, Order, create_missing_indexes
+
+SEED_PASSWORD = "password123"
+BATCH_SIZE = 10_000
+CATEGORIES = ["T-Shirts", "Jeans", "Jackets", "Shoes", "Accessories"]
+ADJECTIVES = ["Classic", "Modern", "Vintage", "Slim", "Relaxed", "Premium", "Everyday", "Sport", "Organic", "Limited"]
+MATERIALS = ["Cotton", "Denim", "Leather", "Canvas", "Wool", "Linen", "Suede", "Mesh"]
+ITEMS = {
+    "T-Shirts": ["Tee", "Polo", "Henley", "Tank Top"],
+    "Jeans": ["Jeans", "Chinos", "Cargo Pants", "Shorts"],
+    "Jackets": ["Jacket", "Parka", "Blazer", "Windbreaker"],
+    "Shoes": ["Sneakers", "Boots", "Loafers", "Sandals"],
+    "Accessories": ["Sunglasses", "Backpack", "Belt", "Cap"],
+}
+IMAGE_URL = "https://via.placeholder.com/400x400?text=Product"
+
+def cheap_password_hash(password: str = SEED_PASSWORD) -> str:
+    """A single-iteration PBKDF2 hash: check_password_hash accepts it, and logins in load tests stay cheap."""
+    return generate_password_hash(password, method="pbkdf2:sha256:1")
+
+def _max_id(model) -> int:
+    return db.session.query(db.func.max(model.id)).scalar() or 0
+
+def _insert(model, rows, batch_size: int) -> int:
+    """Writes mappings from the rows iterator in batches of batch_size; returns the row count."""
+    count, batch = 0, []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= batch_size:
+            db.session.bulk_insert_mappings(model, batch)
+            db.session.commit()
+            count += len(batch)
+            batch = []
+    if batch:
+        db.session.bulk_insert_mappings(model, batch)
+        db.session.commit()
+        count += len(batch)
+    return count
+
+def seed_users(count: int, batch_size: int = BATCH_SIZE, tag: str = None):
+    """Inserts count users named seed_<tag>_<n>, all with SEED_PASSWORD."""
+    tag = tag or uuid.uuid4().hex[:6]
+    password_hash = cheap_password_hash()
+    rows = (
+        {"username": f"seed_{tag}_{n}", "email": f"seed_{tag}_{n}@example.com", "password_hash": password_hash}
+        for n in range(count)
+    )
+    return _insert(User, rows, batch_size)
+
+def seed_products(count: int, batch_size: int = BATCH_SIZE, rng: random.Random = None):
+    rng = rng or random.Random()
+
+    def rows():
+        for n in range(count):
+            category = rng.choice(CATEGORIES)
+            name = f"{rng.choice(ADJECTIVES)} {rng.choice(MATERIALS)} {rng.choice(ITEMS[category])}"
+            yield {
+                "name": f"{name} #{n}",
+                "price": round(rng.uniform(5, 300), 2),
+                "image_url": IMAGE_URL,
+                "category": category,
+                "description": f"{name} from our {category.lower()} range.",
+            }
+    return _insert(Product, rows(), batch_size)
+
+def seed_cart_items(count: int, user_ids: range, product_ids: range, batch_size: int = BATCH_SIZE, rng: random.Random = None):
+    """Inserts count cart rows spread over the given users and products."""
+    rng = rng or random.Random()
+    rows = (
+        {"user_id": rng.choice(user_ids), "product_id": rng.choice(product_ids), "quantity": rng.randint(1, 3)}
+        for _ in range(count)
+    )
+    return _insert(CartItem, rows, batch_size)
+
+def seed_orders(count: int, user_ids: range, batch_size: int = BATCH_SIZE, rng: random.Random = None, days: int = 365):
+    """Inserts count completed orders with created_at spread over the last `days` days."""
+    rng = rng or random.Random()
+    now = datetime.utcnow()
+
+    def rows():
+        for _ in range(count):
+            subtotal = round(rng.uniform(10, 600), 2)
+            coupon = rng.random() < 0.2
+            discount = round(subtotal * 0.20, 2) if coupon else 0.0
+            yield {
+                "user_id": rng.choice(user_ids),
+                "total_price": round(subtotal - discount, 2),
+                "discount_amount": discount,
+                "coupon_code": "SAVE20" if coupon else None,
+                "status": "Completed",
+                "created_at": now - timedelta(seconds=rng.randint(0, days * 86400)),
+            }
+    return _insert(Order, rows(), batch_size)
+
+def seed_all(users: int = 0, products: int = 0, carts: int = 0, orders: int = 0, batch_size: int = BATCH_SIZE, seed: int = None) -> dict:
+    """Seeds each model and returns {model: {"rows", "seconds"}}.
+
+    Cart items and orders go to the users and products created in this run, or to
+    the existing ones when none are created. Must run inside an app context.
+    """
+    rng = random.Random(seed)
+    stats = {}
+
+    def timed(name, function, *args, **kwargs):
+        start = time.perf_counter()
+        rows = function(*args, **kwargs)
+        stats[name] = {"rows": rows, "seconds": round(time.perf_counter() - start, 2)}
+
+    # Ids are assigned sequentially by the bulk inserts; nothing else writes while seeding
+    first_user, first_product = _max_id(User) + 1, _max_id(Product) + 1
+    if users:
+        timed("users", seed_users, users, batch_size)
+    if products:
+        timed("products", seed_products, products, batch_size, rng)
+    user_ids = range(first_user, _max_id(User) + 1) if users else range(1, _max_id(User) + 1)
+    product_ids = range(first_product, _max_id(Product) + 1) if products else range(1, _max_id(Product) + 1)
+
+    if (carts or orders) and not user_ids:
+        raise ValueError("Cart items and orders need users; seed some with --users")
+    if carts and not product_ids:
+        raise ValueError("Cart items need products; seed some with --products")
+    if carts:
+        timed("cart_items", seed_cart_items, carts, user_ids, product_ids, batch_size, rng)
+    if orders:
+        timed("orders", seed_orders, orders, user_ids, batch_size, rng)
+    return stats
+
+@app.cli.command("seed")
+@click.option("--users", default=0, help="Synthetic users (password: password123)")
+@click.option("--products", default=0)
+@click.option("--carts", default=0, help="CartItem rows")
+@click.option("--orders", default=0)
+@click.option("--batch-size", default=BATCH_SIZE)
+@click.option("--seed", type=int, default=None, help="Random seed for reproducible data")
+def seed_command(users, products, carts, orders, batch_size, seed):
+    """Bulk-inserts synthetic test data."""
+    db.create_all()
+    create_missing_indexes()
+    for name, stat in seed_all(users, products, carts, orders, batch_size, seed).items():
+        rate = stat["rows"] / stat["seconds"] if stat["seconds"] else float("inf")
+        click.echo(f"{name:<11}{stat['rows']:>10} rows {stat['seconds']:>8.2f}s {rate:>10.0f} rows/s")
+
+def _count(body: dict, key: str, default, minimum: int = 0):
+    """Reads an integer field of the seed request; ValueError (a 400) for anything else."""
+    value = body.get(key, default)
+    if value is None and default is None:
+        return None
+    if isinstance(value, bool) or not isinstance(value, int) or value < minimum:
+        raise ValueError(f"{key} must be an integer >= {minimum}")
+    return value
+
+@app.route('/__test__/seed', methods=['POST'])
+def seed_endpoint():
+    if not app.config.get('ENABLE_TEST_SEEDING'):
+        abort(404)
+    body = request.get_json(silent=True)
+    try:
+        if body is None:
+            body = {}
+        elif not isinstance(body, dict):
+            raise ValueError("Expected a JSON object")
+        counts = {key: _count(body, key, 0) for key in ("users", "products", "carts", "orders")}
+        batch_size = _count(body, "batch_size", BATCH_SIZE, minimum=1)
+        seed = _count(body, "seed", None)
+        stats = seed_all(**counts, batch_size=batch_size, seed=seed)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    return jsonify(stats)
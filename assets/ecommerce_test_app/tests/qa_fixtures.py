@@ -0,0 +1,116 @@
+"""Test fixtures that set up users, sessions and carts without going through the UI.
+
+Registration, login and cart filling happen over HTTP with `requests` (or, for
+carts, directly against the app's models); the resulting session cookie is then
+injected into the WebDriver, so a test opens the browser already logged in and
+only drives the step it is actually testing.
+
+    from qa_fixtures import logged_in_driver
+
+    driver = webdriver.Chrome()
+    user = logged_in_driver(driver, cart=[1, 2])
+    driver.get(f"{BASE_URL}/cart")
+"""
+import os
+import re
+import sys
+import uuid
+from typing import Dict, Iterable, List, NamedTuple, Optional
+from urllib.parse import urlsplit
+
+import requests
+
+BASE_URL = os.environ.get("QA_BASE_URL", "http://127.0.0.1:5000")
+DEFAULT_PASSWORD = "password123"
+
+class TestUser(NamedTuple):
+    username: str
+    email: str
+    password: str = DEFAULT_PASSWORD
+
+def new_user(prefix: str = "qa") -> TestUser:
+    """A user with a unique username and email (not yet registered)."""
+    unique_id = uuid.uuid4().hex[:8]
+    return TestUser(f"{prefix}_{unique_id}", f"{prefix}_{unique_id}@example.com")
+
+def _expect_redirect(response, path: str, action: str):
+    """Raises unless the response redirects to exactly `path` (so a bounce to /login?next=... fails)."""
+    location = response.headers.get("Location", "")
+    target = urlsplit(location).path
+    if response.status_code not in (301, 302, 303) or target != path:
+        raise RuntimeError(f"{action} failed: HTTP {response.status_code}, redirected to {location or 'nowhere'}")
+
+def register_user(user: TestUser, base_url: str = BASE_URL) -> TestUser:
+    """Registers the user through POST /register."""
+    response = requests.post(
+        f"{base_url}/register",
+        data={"username": user.username, "email": user.email, "password": user.password},
+        allow_redirects=False,
+    )
+    _expect_redirect(response, "/login", f"Registering {user.username}")
+    return user
+
+def login_session(user: TestUser, base_url: str = BASE_URL) -> requests.Session:
+    """Returns a requests session logged in as the user (POST /login)."""
+    session = requests.Session()
+    response = session.post(
+        f"{base_url}/login",
+        data={"username": user.username, "password": user.password},
+        allow_redirects=False,
+    )
+    _expect_redirect(response, "/", f"Logging in as {user.username}")
+    return session
+
+def product_ids(base_url: str = BASE_URL) -> List[int]:
+    """Ids of the products listed on the home page, in page order."""
+    html = requests.get(f"{base_url}/").text
+    return list(dict.fromkeys(int(product_id) for product_id in re.findall(r"/product/(\d+)", html)))
+
+def add_to_cart(session: requests.Session, products: Iterable[int], base_url: str = BASE_URL):
+    """Adds each product id to the session user's cart; repeat an id to raise its quantity."""
+    for product_id in products:
+        response = session.get(f"{base_url}/add_to_cart/{product_id}", allow_redirects=False)
+        _expect_redirect(response, "/", f"Adding product {product_id} to the cart")
+
+def preload_cart_rows(username: str, items: Dict[int, int]):
+    """Writes CartItem rows (product id -> quantity) straight into the app's database.
+
+    Faster than add_to_cart for large carts; must run on the machine that serves
+    the app, with the same DATABASE_URL.
+    """
+    app_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    if app_dir not in sys.path:
+        sys.path.insert(0, app_dir)
+    from app import app
+    from models import db, CartItem, User
+
+    with app.app_context():
+        user = User.query.filter_by(username=username).one()
+        db.session.bulk_insert_mappings(
+            CartItem,
+            [{"user_id": user.id, "product_id": product_id, "quantity": quantity} for product_id, quantity in items.items()],
+        )
+        db.session.commit()
+
+def inject_session(driver, session: requests.Session, base_url: str = BASE_URL):
+    """Copies the session's cookies (login, coupon) into the browser.
+
+    Cookies can only be set for the domain the browser is on, so a cheap 404 page
+    of the app is opened first.
+    """
+    driver.get(f"{base_url}/__qa_fixture__")
+    for cookie in session.cookies:
+        driver.add_cookie({"name": cookie.name, "value": cookie.value, "path": cookie.path or "/"})
+
+def logged_in_driver(driver, cart: Optional[Iterable[int]] = None, user: Optional[TestUser] = None, base_url: str = BASE_URL) -> TestUser:
+    """Registers a fresh user, logs in over HTTP, optionally fills the cart, and logs the driver in.
+
+    Returns the user; the driver is left on a blank page of the app, ready for
+    the test to navigate to the page under test.
+    """
+    user = register_user(user or new_user(), base_url)
+    session = login_session(user, base_url)
+    if cart:
+        add_to_cart(session, cart, base_url)
+    inject_session(driver, session, base_url)
+    return user
@@ -0,0 +1,12 @@
+"""Helpers shared by the benchmark scripts."""
+import time
+
+def timed(function, repeat: int):
+    """Calls function repeat times; returns its last result and the median latency in ms."""
+    latencies, result = [], None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = function()
+        latencies.append((time.perf_counter() - start) * 1000)
+    latencies.sort()
+    return result, latencies[len(latencies) // 2]
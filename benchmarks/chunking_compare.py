@@ -0,0 +1,45 @@
+"""Chunk count, index size and retrieval quality of the chunking strategies.
+
+Builds one knowledge base per strategy in backend.chunking.CHUNKING_STRATEGIES
+from the support documents in assets/ and runs the labeled queries of
+hybrid_retrieval_eval.py against each, with vector-only and hybrid retrieval.
+
+Usage:
+    python benchmarks/chunking_compare.py --k 3
+"""
+import os
+import sys
+import tempfile
+import argparse
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, os.path.join(ROOT, "src"))
+
+from backend.chunking import CHUNKING_STRATEGIES
+from backend.ingestion import create_vector_db, load_documents, load_vector_db
+from backend.generation import _vector_search, hybrid_search
+from hybrid_retrieval_eval import ASSET_FILES, evaluate
+
+def directory_size_kb(path: str) -> float:
+    return sum(os.path.getsize(os.path.join(path, name)) for name in os.listdir(path)) / 1024
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--k", type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"{'strategy':<12}{'chunks':>7}{'chars':>8}{'KB':>8}{'vector':>8}{'hybrid':>8}  (recall@{args.k})")
+    for strategy in CHUNKING_STRATEGIES:
+        db_path = tempfile.mkdtemp(prefix=f"chunking_{strategy}_")
+        documents = load_documents([os.path.join(ROOT, "assets", name) for name in ASSET_FILES], chunking=strategy)
+        create_vector_db(documents, db_path=db_path, chunking=strategy)
+        vector_db = load_vector_db(db_path=db_path)
+
+        ids = list(vector_db.index_to_docstore_id.values())
+        chars = sum(len(vector_db.docstore.search(id_).page_content) for id_ in ids)
+        vector_recall, _, _ = evaluate(_vector_search, vector_db, args.k)
+        hybrid_recall, _, _ = evaluate(hybrid_search, vector_db, args.k)
+        print(f"{strategy:<12}{len(ids):>7}{chars:>8}{directory_size_kb(db_path):>8.1f}{vector_recall:>8.2f}{hybrid_recall:>8.2f}")
+
+if __name__ == "__main__":
+    main()
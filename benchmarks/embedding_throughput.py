@@ -0,0 +1,89 @@
+"""Embedding throughput benchmark: chunks/second per embedding backend.
+
+Embeds the chunks of the bundled assets/ corpus with every backend in
+EMBEDDING_BACKENDS and reports throughput plus recall@k of each backend's
+nearest neighbours against the default torch backend.
+
+Usage:
+    python benchmarks/embedding_throughput.py --batch-size 64 --threads 4
+"""
+import os
+import sys
+import glob
+import time
+import argparse
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from langchain_text_splitters import RecursiveCharacterTextSplitter
+from backend.ingestion import (
+    CHUNK_SIZE,
+    CHUNK_OVERLAP,
+    EMBEDDING_BACKENDS,
+    EmbeddingConfig,
+    build_embedding_model,
+    load_documents,
+)
+
+ASSETS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "assets")
+QUERIES = [
+    "Test discount codes",
+    "SAVE20 coupon applies 20% off",
+    "Checkout form validation errors",
+    "Add item to cart and remove it",
+    "Express shipping cost",
+    "Pay now button behaviour",
+]
+
+def corpus_chunks(min_chunks: int):
+    paths = [p for p in glob.glob(os.path.join(ASSETS_DIR, "**", "*"), recursive=True) if os.path.isfile(p)]
+    documents = load_documents(paths)
+    splitter = RecursiveCharacterTextSplitter(chunk_size=CHUNK_SIZE, chunk_overlap=CHUNK_OVERLAP)
+    texts = [chunk.page_content for chunk in splitter.split_documents(documents)]
+    # Repeat the small bundled corpus so timings are not dominated by warm-up
+    repeats = max(1, -(-min_chunks // len(texts)))
+    return (texts * repeats)[:max(min_chunks, len(texts))], texts
+
+def top_k(doc_vectors, query_vectors, k):
+    docs = np.asarray(doc_vectors, dtype=np.float32)
+    queries = np.asarray(query_vectors, dtype=np.float32)
+    distances = ((queries[:, None, :] - docs[None, :, :]) ** 2).sum(axis=-1)
+    return [set(row) for row in np.argsort(distances, axis=1)[:, :k]]
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--batch-size", type=int, default=64)
+    parser.add_argument("--threads", type=int, default=None)
+    parser.add_argument("--min-chunks", type=int, default=512)
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--backends", nargs="+", default=list(EMBEDDING_BACKENDS))
+    args = parser.parse_args()
+
+    texts, unique_texts = corpus_chunks(args.min_chunks)
+    print(f"Corpus: {len(unique_texts)} unique chunks, benchmarking on {len(texts)}")
+
+    baseline = None
+    print(f"{'backend':<12}{'chunks/s':>12}{'seconds':>10}{f'recall@{args.k}':>12}")
+    for backend in args.backends:
+        config = EmbeddingConfig(backend=backend, batch_size=args.batch_size, num_threads=args.threads)
+        try:
+            model = build_embedding_model(config)
+            model.embed_documents(texts[:args.batch_size])  # warm-up
+        except Exception as e:
+            print(f"{backend:<12}  unavailable: {type(e).__name__}: {e}")
+            continue
+
+        start = time.perf_counter()
+        model.embed_documents(texts)
+        elapsed = time.perf_counter() - start
+
+        neighbours = top_k(model.embed_documents(unique_texts), model.embed_documents(QUERIES), args.k)
+        if baseline is None:
+            baseline = neighbours
+        recall = np.mean([len(a & b) / args.k for a, b in zip(neighbours, baseline)])
+        print(f"{backend:<12}{len(texts) / elapsed:>12.1f}{elapsed:>10.2f}{recall:>12.2f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,43 @@
+"""Token reduction report for HTML distillation.
+
+Compares the token count of every bundled assets/ HTML page with the token count
+of its locator map, as fed to the Selenium script prompt.
+
+Usage:
+    python benchmarks/html_distill_report.py [--show PAGE]
+"""
+import os
+import sys
+import glob
+import argparse
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from backend.html_distill import distill_html
+from backend.tokens import count_tokens
+
+ASSETS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "assets")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--show", default=None, help="Print the locator map of the page with this file name")
+    args = parser.parse_args()
+
+    paths = sorted(glob.glob(os.path.join(ASSETS_DIR, "**", "*.html"), recursive=True))
+    total_raw = total_distilled = 0
+    print(f"{'page':<48}{'raw tokens':>12}{'map tokens':>12}{'reduction':>11}")
+    for path in paths:
+        with open(path, encoding="utf-8") as f:
+            html = f.read()
+        locator_map = distill_html(html)
+        raw, distilled = count_tokens(html), count_tokens(locator_map)
+        total_raw += raw
+        total_distilled += distilled
+        print(f"{os.path.relpath(path, ASSETS_DIR):<48}{raw:>12}{distilled:>12}{1 - distilled / raw:>10.1%}")
+        if args.show and os.path.basename(path) == args.show:
+            print(locator_map)
+    if total_raw:
+        print(f"{'TOTAL':<48}{total_raw:>12}{total_distilled:>12}{1 - total_distilled / total_raw:>10.1%}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""Recall@k and latency of hybrid (BM25 + vector, RRF) vs vector-only retrieval.
+
+Builds a knowledge base from the support documents in assets/ and runs a small
+labeled query set against it. A query counts as answered at k when one of the
+top-k chunks contains one of its labeled snippets; the retrieval cache is
+bypassed so latencies are those of the searches themselves.
+
+Usage:
+    python benchmarks/hybrid_retrieval_eval.py --k 3
+"""
+import os
+import sys
+import time
+import tempfile
+import argparse
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, os.path.join(ROOT, "src"))
+
+from backend.ingestion import create_vector_db, load_documents, load_vector_db
+from backend.generation import _vector_search, hybrid_search
+
+ASSET_FILES = ("product_specs.md", "api_endpoints.json", "ui_ux_guide.txt", "checkout.html")
+
+# (query, snippets any of which marks a chunk as relevant)
+LABELED_QUERIES = [
+    ("Test discount codes", ["SAVE20"]),
+    ("SAVE20 coupon", ["SAVE20"]),
+    ("Remove an applied coupon", ["Remove Coupon", "/remove_coupon"]),
+    ("coupon_code cookie expiration", ["coupon_code' with 1-hour", "1-hour expiration"]),
+    ("Express shipping cost", ["Express Shipping"]),
+    ("Invalid username or password on login", ["Invalid username or password"]),
+    ("Duplicate usernames during registration", ["Duplicate usernames", "username exists"]),
+    ("POST /checkout creates an order", ["POST /checkout"]),
+    ("Filter products by category", ["Category Filter", "Filter by category"]),
+    ("Pay Now button disabled after payment", ["Pay Now"]),
+    ("Order status after placement", ["Completed"]),
+    ("GET /orders order history", ["GET /orders", "Order History"]),
+    ("Add to Cart button color", ["#007bff"]),
+    ("Order model discount_amount field", ["discount_amount"]),
+    ("Leather Jacket price", ["Leather Jacket"]),
+]
+
+def evaluate(search, vector_db, k: int):
+    answered, latencies = 0, []
+    for query, snippets in LABELED_QUERIES:
+        start = time.perf_counter()
+        docs = search(vector_db, query, k)
+        latencies.append((time.perf_counter() - start) * 1000)
+        if any(snippet in doc.page_content for doc in docs for snippet in snippets):
+            answered += 1
+    latencies.sort()
+    return answered / len(LABELED_QUERIES), sum(latencies) / len(latencies), latencies[len(latencies) // 2]
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--k", type=int, nargs="+", default=[1, 3, 5])
+    parser.add_argument("--db", default=None, help="Knowledge base directory (default: a temporary one built from assets/)")
+    args = parser.parse_args()
+
+    db_path = args.db or tempfile.mkdtemp(prefix="hybrid_eval_")
+    if not os.path.exists(os.path.join(db_path, "index.faiss")):
+        documents = load_documents([os.path.join(ROOT, "assets", name) for name in ASSET_FILES])
+        create_vector_db(documents, db_path=db_path)
+    vector_db = load_vector_db(db_path=db_path)
+    if getattr(vector_db, "keyword_index", None) is None:
+        sys.exit(f"{db_path} has no BM25 index; rebuild it with create_vector_db()")
+
+    # Warm up the embedding model so the first query does not pay for loading it
+    _vector_search(vector_db, "warm up", 1)
+
+    print(f"{len(LABELED_QUERIES)} labeled queries, {len(vector_db.index_to_docstore_id)} chunks")
+    print(f"{'retrieval':<10}{'k':>4}{'recall':>8}{'mean ms':>9}{'p50 ms':>8}")
+    for k in args.k:
+        for name, search in (("vector", _vector_search), ("hybrid", hybrid_search)):
+            recall, mean_ms, p50_ms = evaluate(search, vector_db, k)
+            print(f"{name:<10}{k:>4}{recall:>8.2f}{mean_ms:>9.2f}{p50_ms:>8.2f}")
+
+if __name__ == "__main__":
+    main()
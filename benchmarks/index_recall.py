@@ -0,0 +1,90 @@
+"""Recall-vs-latency report for the FAISS index types.
+
+Builds every index type in INDEX_TYPES over the same vectors and compares
+recall@k and per-query latency against the exact flat index, sweeping nprobe
+(IVF) and efSearch (HNSW).
+
+Vectors come from a synthetic clustered set of --n points by default, or from an
+existing flat knowledge base with --db faiss_db.
+
+Usage:
+    python benchmarks/index_recall.py --n 100000 --k 5
+"""
+import os
+import sys
+import time
+import argparse
+
+import faiss
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from backend.faiss_index import INDEX_TYPES, IndexSpec, create_index, resolve_spec, set_search_params
+
+NPROBE_SWEEP = (1, 4, 8, 16, 32)
+EF_SEARCH_SWEEP = (16, 32, 64, 128)
+
+def synthetic_vectors(n: int, dim: int, seed: int = 0):
+    """Gaussian blobs around random centres, roughly like sentence embeddings of a doc corpus."""
+    rng = np.random.default_rng(seed)
+    centres = rng.normal(size=(max(1, n // 200), dim)).astype(np.float32)
+    labels = rng.integers(0, len(centres), size=n)
+    return (centres[labels] + 0.3 * rng.normal(size=(n, dim))).astype(np.float32)
+
+def db_vectors(db_path: str):
+    index = faiss.read_index(os.path.join(db_path, "index.faiss"))
+    return index.reconstruct_n(0, index.ntotal)
+
+def measure(index, queries, k, truth):
+    start = time.perf_counter()
+    _, found = index.search(queries, k)
+    latency_ms = (time.perf_counter() - start) * 1000 / len(queries)
+    recall = np.mean([len(set(row) & set(expected)) / k for row, expected in zip(found, truth)])
+    return recall, latency_ms
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--n", type=int, default=50_000)
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--db", default=None, help="Use the vectors of an existing flat index instead")
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--k", type=int, default=5)
+    args = parser.parse_args()
+
+    vectors = db_vectors(args.db) if args.db else synthetic_vectors(args.n, args.dim)
+    n, dim = vectors.shape
+    rng = np.random.default_rng(1)
+    queries = vectors[rng.choice(n, size=min(args.queries, n), replace=False)] + 0.05 * rng.normal(size=(min(args.queries, n), dim)).astype(np.float32)
+    queries = queries.astype(np.float32)
+
+    flat = faiss.IndexFlatL2(dim)
+    flat.add(vectors)
+    _, truth = flat.search(queries, args.k)
+
+    print(f"{n} vectors, dim {dim}, {len(queries)} queries, k={args.k}")
+    print(f"{'index':<10}{'param':<14}{'recall':>8}{'ms/query':>10}{'build s':>9}{'MB':>8}")
+    for index_type in INDEX_TYPES:
+        spec = resolve_spec(IndexSpec(type=index_type), n, dim)
+        start = time.perf_counter()
+        index = create_index(spec, dim)
+        if not index.is_trained:
+            index.train(vectors[rng.choice(n, size=min(n, 65_536), replace=False)])
+        index.add(vectors)
+        build_seconds = time.perf_counter() - start
+        size_mb = len(faiss.serialize_index(index)) / 2 ** 20
+
+        if spec.type.startswith("ivf"):
+            sweep = [("nprobe", value, spec._replace(nprobe=value)) for value in NPROBE_SWEEP]
+        elif spec.type == "hnsw":
+            sweep = [("efSearch", value, spec._replace(ef_search=value)) for value in EF_SEARCH_SWEEP]
+        else:
+            sweep = [("exact", "", spec)]
+
+        for name, value, tuned in sweep:
+            set_search_params(index, tuned)
+            recall, latency_ms = measure(index, queries, args.k, truth)
+            print(f"{spec.type:<10}{f'{name}={value}' if value != '' else name:<14}{recall:>8.3f}{latency_ms:>10.3f}{build_seconds:>9.2f}{size_mb:>8.1f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+"""Keyset vs OFFSET pagination of the product grid in the ecommerce test app.
+
+Seeds --products synthetic products into a temporary SQLite database and times
+fetching one page at increasing depths, with and without a category filter,
+once with LIMIT/OFFSET and once with the keyset cursor the app uses. OFFSET
+latency grows with the depth; keyset latency stays flat.
+
+Usage:
+    python benchmarks/pagination.py --products 500000
+"""
+import os
+import sys
+import random
+import tempfile
+import argparse
+
+from _util import timed
+
+APP_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "assets", "ecommerce_test_app")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--products", type=int, default=200_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    # The app reads DATABASE_URL at import time
+    db_path = os.path.join(tempfile.mkdtemp(prefix="pagination_"), "bench.db")
+    os.environ["DATABASE_URL"] = f"sqlite:///{db_path}"
+    sys.path.insert(0, APP_DIR)
+    from app import app
+    from models import db, Product, create_missing_indexes
+    from pagination import PRODUCTS_PER_PAGE
+    from seeding import seed_products
+
+    with app.app_context():
+        db.create_all()
+        create_missing_indexes()
+        seed_products(args.products, rng=random.Random(0))
+        print(f"{args.products} products, {PRODUCTS_PER_PAGE} per page")
+
+        print(f"{'category':<11}{'depth':>9}{'offset ms':>11}{'keyset ms':>11}")
+        for category in ("", "Shoes"):
+            query = Product.query.filter(Product.category == category) if category else Product.query
+            ids = [row.id for row in query.with_entities(Product.id).order_by(Product.id)]
+            for depth in (0, len(ids) // 100, len(ids) // 10, len(ids) // 2, len(ids) - PRODUCTS_PER_PAGE):
+                offset_rows, offset_ms = timed(
+                    lambda: query.order_by(Product.id).offset(depth).limit(PRODUCTS_PER_PAGE + 1).all(), args.repeat)
+                after = ids[depth - 1] if depth else 0
+                keyset_rows, keyset_ms = timed(
+                    lambda: query.filter(Product.id > after).order_by(Product.id).limit(PRODUCTS_PER_PAGE + 1).all(), args.repeat)
+                assert [p.id for p in offset_rows] == [p.id for p in keyset_rows]
+                print(f"{category or '-':<11}{depth:>9}{offset_ms:>11.2f}{keyset_ms:>11.2f}")
+
+if __name__ == "__main__":
+    main()
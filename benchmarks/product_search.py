@@ -0,0 +1,76 @@
+"""FTS5 product search vs the ilike full scan in the ecommerce test app.
+
+Seeds --products synthetic products into a temporary SQLite database, then runs
+a set of search queries (full words, prefixes as typed keystroke by keystroke,
+with a category filter, and rare or missing terms) through both search paths
+and reports per-query median latency and result counts.
+
+Note that the two paths do different work: ilike returns matches in table order
+(with --limit it stops at the first page of hits), FTS ranks all matches by
+bm25 before returning the best ones.
+
+Usage:
+    python benchmarks/product_search.py --products 100000
+"""
+import os
+import sys
+import time
+import random
+import tempfile
+import argparse
+
+from _util import timed
+
+APP_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "assets", "ecommerce_test_app")
+
+QUERIES = [
+    ("leather", ""),
+    ("leather jacket", ""),
+    ("vintage denim", ""),
+    ("sneak", ""),
+    ("ca", ""),
+    ("can", ""),
+    ("canv", ""),
+    ("canvas backpack", ""),
+    ("premium", "Shoes"),
+    ("cotton tee", "T-Shirts"),
+    # Rare and missing terms: the scan cannot stop early
+    ("54321", ""),
+    ("velvet", ""),
+]
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--products", type=int, default=100_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--limit", type=int, default=None, help="Page size applied to both paths")
+    args = parser.parse_args()
+
+    # The app reads DATABASE_URL at import time
+    db_path = os.path.join(tempfile.mkdtemp(prefix="product_search_"), "bench.db")
+    os.environ["DATABASE_URL"] = f"sqlite:///{db_path}"
+    sys.path.insert(0, APP_DIR)
+    from app import app
+    from models import db
+    from seeding import seed_products
+    from search import ilike_search, init_search, search_products
+
+    with app.app_context():
+        db.create_all()
+        start = time.perf_counter()
+        seed_products(args.products, rng=random.Random(0))
+        seed_seconds = time.perf_counter() - start
+        start = time.perf_counter()
+        if not init_search():
+            sys.exit("SQLite was built without FTS5")
+        index_seconds = time.perf_counter() - start
+        print(f"{args.products} products seeded in {seed_seconds:.1f}s, FTS index built in {index_seconds:.1f}s")
+
+        print(f"{'query':<18}{'category':<11}{'ilike ms':>9}{'rows':>7}{'fts ms':>9}{'rows':>7}{'speed-up':>9}")
+        for query, category in QUERIES:
+            ilike_rows, ilike_ms = timed(lambda: ilike_search(query, category).limit(args.limit).all(), args.repeat)
+            fts_rows, fts_ms = timed(lambda: search_products(query, category, limit=args.limit), args.repeat)
+            print(f"{query:<18}{category or '-':<11}{ilike_ms:>9.1f}{len(ilike_rows):>7}{fts_ms:>9.1f}{len(fts_rows):>7}{ilike_ms / fts_ms:>8.1f}x")
+
+if __name__ == "__main__":
+    main()
@@ -1,16 +1,27 @@
 import streamlit as st
 import os
+import logging
 import tempfile
+import time
 from dotenv import load_dotenv
 
 # Import backend modules
-from backend.ingestion import load_documents, create_vector_db, load_vector_db
+from backend.ingestion import iter_load_files, create_vector_db, load_vector_db
 from backend.rag import get_llm
-from backend.generation import generate_test_cases, generate_selenium_script
+from backend.page_index import PAGE_INDEX_FILE, build_page_index, save_page_index, load_page_index
+from backend.generation import (
+    stream_test_cases,
+    stream_selenium_script,
+    parse_test_cases,
+    generate_selenium_scripts,
+)
 
 # Load environment variables
 load_dotenv()
 
+# Backend modules log prompt token counts and context packing at INFO
+logging.basicConfig(level=os.getenv("LOG_LEVEL", "INFO"), format="%(asctime)s %(name)s %(levelname)s: %(message)s")
+
 st.set_page_config(page_title="Autonomous QA Agent", layout="wide")
 
 # Custom CSS for skeleton loading
@@ -64,30 +75,6 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
-def render_skeleton_progress():
-    """Render skeleton for knowledge base building progress."""
-    return """
-    <div style="padding: 20px;">
-        <div class="skeleton-card">
-            <div class="skeleton skeleton-line medium"></div>
-            <div style="height: 8px;"></div>
-            <div class="skeleton skeleton-line long"></div>
-            <div class="skeleton skeleton-line medium"></div>
-        </div>
-        <div class="skeleton-card">
-            <div class="skeleton skeleton-line short"></div>
-            <div style="height: 8px;"></div>
-            <div class="skeleton skeleton-line long"></div>
-        </div>
-        <div class="skeleton-card">
-            <div class="skeleton skeleton-line medium"></div>
-            <div style="height: 8px;"></div>
-            <div class="skeleton skeleton-line long"></div>
-            <div class="skeleton skeleton-line short"></div>
-        </div>
-    </div>
-    """
-
 def render_skeleton_cards():
     """Render skeleton cards for test case generation."""
     return """
@@ -137,6 +124,19 @@ def render_skeleton_code():
     </div>
     """
 
+def render_stream(placeholder, tokens, render):
+    """Render streamed tokens progressively; returns (text, time to first token, total time)."""
+    start = time.perf_counter()
+    first_token_at = None
+    text = ""
+    for token in tokens:
+        if first_token_at is None:
+            first_token_at = time.perf_counter() - start
+        text += token
+        render(placeholder, text)
+    total = time.perf_counter() - start
+    return text, first_token_at if first_token_at is not None else total, total
+
 st.title("Autonomous QA Agent 🤖")
 st.markdown("Generate Test Cases and Selenium Scripts from your documentation.")
 
@@ -146,6 +146,11 @@ with st.sidebar:
     api_key = os.getenv("GOOGLE_API_KEY","")
     if not api_key:
         api_key = st.text_input("Enter Google API Key", type="password")
+    use_llm_cache = st.checkbox(
+        "Reuse cached LLM responses",
+        value=True,
+        help="Answer identical prompts from the local response cache instead of calling Gemini again."
+    )
     
     st.header("Knowledge Base")
     uploaded_files = st.file_uploader(
@@ -159,17 +164,23 @@ with st.sidebar:
         type=["html"]
     )
     
+    html_dir = st.text_input(
+        "HTML Pages Directory (optional)",
+        placeholder="assets/ecommerce_test_app/templates",
+        help="Index every page in this directory; scripts then get the locators of the pages relevant to each test case."
+    )
+    
     if st.button("Build Knowledge Base"):
         if not api_key:
             st.error("Please provide a Google API Key.")
-        elif not uploaded_files or not uploaded_html:
-            st.error("Please upload both support documents and the HTML file.")
+        elif not uploaded_files or not (uploaded_html or html_dir):
+            st.error("Please upload support documents and an HTML file or pages directory.")
+        elif html_dir and not os.path.isdir(html_dir):
+            st.error(f"HTML pages directory not found: {html_dir}")
         else:
-            # Create placeholder for skeleton loading
-            loading_placeholder = st.empty()
-            
-            # Show skeleton while loading
-            loading_placeholder.markdown(render_skeleton_progress(), unsafe_allow_html=True)
+            # Progress indicators for the streaming ingestion pipeline
+            progress_bar = st.progress(0.0, text="Loading documents...")
+            status_text = st.empty()
             
             # Save uploaded files temporarily
             temp_dir = tempfile.mkdtemp()
@@ -183,19 +194,42 @@ with st.sidebar:
                 file_paths.append(path)
             
             # Save HTML
-            html_path = os.path.join(temp_dir, uploaded_html.name)
-            with open(html_path, "wb") as f:
-                f.write(uploaded_html.getbuffer())
-            file_paths.append(html_path)
+            if uploaded_html:
+                html_path = os.path.join(temp_dir, uploaded_html.name)
+                with open(html_path, "wb") as f:
+                    f.write(uploaded_html.getbuffer())
+                file_paths.append(html_path)
+            
+            # Precompute per-page locator maps for the whole directory
+            if html_dir:
+                save_page_index(build_page_index(html_dir), os.path.join("faiss_db", PAGE_INDEX_FILE))
+            
+            # Ingest: documents stream from the loader pool into batched embedding
+            load_errors = []
+            
+            def stream_documents():
+                done = 0
+                for result in iter_load_files(file_paths, max_workers=os.cpu_count() or 1):
+                    if result.error:
+                        load_errors.append(result)
+                    if not result.partial:
+                        done += 1
+                        progress_bar.progress(done / len(file_paths), text=f"Loaded {done}/{len(file_paths)} files")
+                    yield from result.documents
             
-            # Ingest
-            documents = load_documents(file_paths)
-            create_vector_db(documents, api_key)
+            def on_embedded(chunk_count):
+                status_text.caption(f"Embedded {chunk_count} chunks")
             
-            # Clear skeleton and show success
-            loading_placeholder.empty()
+            create_vector_db(stream_documents(), api_key, incremental=True, progress_callback=on_embedded)
+            
+            # Clear progress and show result
+            progress_bar.empty()
+            status_text.empty()
+            for result in load_errors:
+                st.warning(f"Could not load {os.path.basename(result.path)}: {result.error}")
             st.success("Knowledge Base Built Successfully!")
-            st.session_state["html_content"] = uploaded_html.getvalue().decode("utf-8")
+            st.session_state["html_content"] = uploaded_html.getvalue().decode("utf-8") if uploaded_html else ""
+            st.session_state["use_page_index"] = bool(html_dir)
 
 # Main Content
 if "html_content" not in st.session_state:
@@ -205,8 +239,9 @@ else:
     
     # Initialize LLM and Vector DB
     if api_key:
-        vector_db = load_vector_db(api_key)
+        vector_db = load_vector_db(api_key, mmap=True)
         llm = get_llm(api_key)
+    page_index = load_page_index(os.path.join("faiss_db", PAGE_INDEX_FILE)) if st.session_state.get("use_page_index") else None
     
     with tab1:
         st.header("Generate Test Cases")
@@ -223,12 +258,14 @@ else:
                 loading_placeholder.markdown(render_skeleton_cards(), unsafe_allow_html=True)
                 
                 try:
-                    result = generate_test_cases(llm, vector_db, requirement)
+                    # Skeleton is replaced by the text as soon as the first token arrives
+                    result, ttft, total = render_stream(
+                        loading_placeholder,
+                        stream_test_cases(llm, vector_db, requirement, use_cache=use_llm_cache),
+                        lambda placeholder, text: placeholder.markdown(text)
+                    )
                     st.session_state["last_test_cases"] = result
-                    
-                    # Clear skeleton and show result
-                    loading_placeholder.empty()
-                    st.markdown(result)
+                    st.caption(f"First token: {ttft:.2f}s · Total: {total:.2f}s")
                 except Exception as e:
                     loading_placeholder.empty()
                     st.error(f"Error: {e}")
@@ -253,16 +290,65 @@ else:
                 loading_placeholder.markdown(render_skeleton_code(), unsafe_allow_html=True)
                 
                 try:
-                    script = generate_selenium_script(
-                        llm, 
-                        vector_db, 
-                        test_case_input, 
-                        st.session_state["html_content"]
+                    # Skeleton is replaced by the code as soon as the first token arrives
+                    script, ttft, total = render_stream(
+                        loading_placeholder,
+                        stream_selenium_script(
+                            llm, 
+                            vector_db, 
+                            test_case_input, 
+                            st.session_state["html_content"],
+                            use_cache=use_llm_cache,
+                            page_index=page_index
+                        ),
+                        lambda placeholder, text: placeholder.code(text, language="python")
                     )
-                    
-                    # Clear skeleton and show result
-                    loading_placeholder.empty()
-                    st.code(script, language="python")
+                    st.caption(f"First token: {ttft:.2f}s · Total: {total:.2f}s")
                 except Exception as e:
                     loading_placeholder.empty()
                     st.error(f"Error: {e}")
+
+        st.divider()
+        st.subheader("Batch: one script per test case")
+        max_concurrency = st.number_input("Concurrent LLM calls", min_value=1, max_value=20, value=5)
+        
+        if st.button("Generate Scripts for All Test Cases"):
+            try:
+                test_cases = parse_test_cases(test_case_input)
+            except ValueError as e:
+                test_cases = []
+                st.warning(f"Could not parse a JSON list of test cases: {e}")
+            
+            if test_cases:
+                status_placeholder = st.empty()
+                statuses = ["queued"] * len(test_cases)
+                
+                def on_status(index, status):
+                    statuses[index] = status
+                    status_placeholder.markdown("\n".join(
+                        f"- `{case.get('Test_ID', f'TC_{i + 1:03d}')}`: {statuses[i]}"
+                        for i, case in enumerate(test_cases)
+                    ))
+                
+                start = time.perf_counter()
+                results = generate_selenium_scripts(
+                    llm,
+                    vector_db,
+                    test_cases,
+                    st.session_state["html_content"],
+                    max_concurrency=int(max_concurrency),
+                    use_cache=use_llm_cache,
+                    on_status=on_status,
+                    page_index=page_index
+                )
+                st.caption(
+                    f"{sum(r.error is None for r in results)}/{len(results)} scripts generated "
+                    f"in {time.perf_counter() - start:.1f}s"
+                )
+                for result in results:
+                    label = f"{result.test_id} — {result.seconds:.1f}s, {result.attempts} attempt(s)"
+                    with st.expander(label if result.error is None else f"{label} — FAILED"):
+                        if result.error is None:
+                            st.code(result.script, language="python")
+                        else:
+                            st.error(result.error)
@@ -0,0 +1,199 @@
+import os
+import re
+import math
+import sqlite3
+import threading
+from collections import Counter, defaultdict
+from typing import List, Optional, Tuple
+
+BM25_FILE = "bm25.sqlite"
+BUILD_BATCH_SIZE = 1000
+BM25_K1 = 1.5
+BM25_B = 0.75
+# Rank offset of reciprocal rank fusion; 60 is the value from the original RRF paper
+RRF_K = 60
+
+_TOKEN = re.compile(r"[a-z0-9]+(?:[_-][a-z0-9]+)*")
+_STOPWORDS = frozenset(
+    "a an and are as at be by for from has have in is it its of on or that the this to was were will with".split()
+)
+
+_SCHEMA = """
+CREATE TABLE stats (key TEXT PRIMARY KEY, value REAL NOT NULL);
+CREATE TABLE chunks (number INTEGER PRIMARY KEY, id TEXT NOT NULL, length INTEGER NOT NULL);
+CREATE INDEX chunks_id ON chunks (id);
+CREATE TABLE postings (
+    term TEXT NOT NULL, number INTEGER NOT NULL, frequency INTEGER NOT NULL,
+    PRIMARY KEY (term, number)
+) WITHOUT ROWID;
+"""
+
+def fold_plural(word: str) -> str:
+    """Light plural folding so "coupons" matches "coupon"."""
+    if len(word) > 3 and word.endswith("s") and not word.endswith("ss") and word.isalpha():
+        return word[:-1]
+    return word
+
+def tokenize(text: str) -> List[str]:
+    """Lowercased word tokens; codes like SAVE20 or /api/cart stay intact as terms."""
+    return [fold_plural(token) for token in _TOKEN.findall(text.lower()) if token not in _STOPWORDS]
+
+class BM25Index:
+    """Inverted index over the chunks of a knowledge base, scored with Okapi BM25.
+
+    The index lives in db_path/bm25.sqlite: postings map each term to (chunk
+    number, term frequency) rows and chunk numbers map to the docstore ids shared
+    with the FAISS store. Opening it reads nothing up front; a search reads only
+    the postings of the query's terms.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True, check_same_thread=False)
+        stats = dict(self._conn.execute("SELECT key, value FROM stats"))
+        self.total = int(stats["total"])
+        self.average_length = stats["average_length"]
+
+    @classmethod
+    def build(cls, chunks, db_path: str) -> "BM25Index":
+        """Indexes (docstore id, text) pairs into db_path/bm25.sqlite, replacing it atomically."""
+        path = os.path.join(db_path, BM25_FILE)
+        tmp_path = path + ".tmp"
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+        conn = sqlite3.connect(tmp_path)
+        conn.executescript(_SCHEMA)
+        total = total_length = 0
+        chunk_rows, posting_rows = [], []
+        for number, (id_, text) in enumerate(chunks):
+            terms = tokenize(text)
+            chunk_rows.append((number, id_, len(terms)))
+            posting_rows.extend((term, number, frequency) for term, frequency in Counter(terms).items())
+            total, total_length = total + 1, total_length + len(terms)
+            if len(chunk_rows) >= BUILD_BATCH_SIZE:
+                _write_rows(conn, chunk_rows, posting_rows)
+                chunk_rows, posting_rows = [], []
+        _write_rows(conn, chunk_rows, posting_rows)
+        conn.executemany(
+            "INSERT INTO stats (key, value) VALUES (?, ?)",
+            [("total", total), ("average_length", total_length / total if total else 0.0)],
+        )
+        conn.commit()
+        conn.close()
+
+        os.replace(tmp_path, path)
+        return cls(path)
+
+    @classmethod
+    def update(cls, db_path: str, added, removed) -> "BM25Index":
+        """Applies added and removed (docstore id, text) pairs to db_path/bm25.sqlite in place.
+
+        Removed texts are re-tokenized to find their postings, so only the rows of
+        the changed chunks are touched.
+        """
+        path = os.path.join(db_path, BM25_FILE)
+        conn = sqlite3.connect(path)
+        try:
+            with conn:
+                # Files written before the id index existed
+                conn.execute("CREATE INDEX IF NOT EXISTS chunks_id ON chunks (id)")
+                stats = dict(conn.execute("SELECT key, value FROM stats"))
+                total = int(stats["total"])
+                total_length = stats["average_length"] * total
+                for id_, text in removed:
+                    row = conn.execute("SELECT number, length FROM chunks WHERE id = ?", (id_,)).fetchone()
+                    if row is None:
+                        continue
+                    number, length = row
+                    conn.executemany(
+                        "DELETE FROM postings WHERE term = ? AND number = ?",
+                        [(term, number) for term in set(tokenize(text))],
+                    )
+                    conn.execute("DELETE FROM chunks WHERE number = ?", (number,))
+                    total, total_length = total - 1, total_length - length
+
+                number = conn.execute("SELECT COALESCE(MAX(number), -1) FROM chunks").fetchone()[0]
+                chunk_rows, posting_rows = [], []
+                for id_, text in added:
+                    number += 1
+                    terms = tokenize(text)
+                    chunk_rows.append((number, id_, len(terms)))
+                    posting_rows.extend((term, number, frequency) for term, frequency in Counter(terms).items())
+                    total, total_length = total + 1, total_length + len(terms)
+                    if len(chunk_rows) >= BUILD_BATCH_SIZE:
+                        _write_rows(conn, chunk_rows, posting_rows)
+                        chunk_rows, posting_rows = [], []
+                _write_rows(conn, chunk_rows, posting_rows)
+                conn.executemany(
+                    "INSERT OR REPLACE INTO stats (key, value) VALUES (?, ?)",
+                    [("total", total), ("average_length", total_length / total if total else 0.0)],
+                )
+        finally:
+            conn.close()
+        return cls(path)
+
+    def search(self, query: str, k: int) -> List[Tuple[str, float]]:
+        """Returns up to k (docstore id, score) pairs, best first."""
+        scores = defaultdict(float)
+        ids = {}
+        for term in set(tokenize(query)):
+            with self._lock:
+                postings = self._conn.execute(
+                    "SELECT postings.number, postings.frequency, chunks.length, chunks.id FROM postings"
+                    " JOIN chunks ON chunks.number = postings.number WHERE postings.term = ?",
+                    (term,),
+                ).fetchall()
+            if not postings:
+                continue
+            idf = math.log(1 + (self.total - len(postings) + 0.5) / (len(postings) + 0.5))
+            for number, frequency, length, id_ in postings:
+                norm = 1 - BM25_B + BM25_B * length / (self.average_length or 1)
+                scores[number] += idf * frequency * (BM25_K1 + 1) / (frequency + BM25_K1 * norm)
+                ids[number] = id_
+        best = sorted(scores.items(), key=lambda item: item[1], reverse=True)[:k]
+        return [(ids[number], score) for number, score in best]
+
+    @classmethod
+    def load(cls, db_path: str) -> Optional["BM25Index"]:
+        path = os.path.join(db_path, BM25_FILE)
+        if not os.path.exists(path):
+            return None
+        return cls(path)
+
+    def close(self) -> None:
+        self._conn.close()
+
+def _write_rows(conn, chunk_rows, posting_rows):
+    conn.executemany("INSERT INTO chunks (number, id, length) VALUES (?, ?, ?)", chunk_rows)
+    conn.executemany("INSERT INTO postings (term, number, frequency) VALUES (?, ?, ?)", posting_rows)
+
+def build_keyword_index(vector_db, db_path: str) -> BM25Index:
+    """Builds the BM25 index over every chunk of a FAISS store and saves it to db_path/bm25.sqlite."""
+    chunks = (
+        (id_, vector_db.docstore.search(id_).page_content)
+        for id_ in vector_db.index_to_docstore_id.values()
+    )
+    return BM25Index.build(chunks, db_path)
+
+def update_keyword_index(docstore, db_path: str) -> BM25Index:
+    """Applies the chunks a StagedDocstore added and deleted to db_path/bm25.sqlite.
+
+    Call it before docstore.commit(), while the deleted chunks' texts are still stored.
+    """
+    removed = ((id_, docstore.store.search(id_)) for id_ in docstore.deleted)
+    return BM25Index.update(
+        db_path,
+        ((id_, doc.page_content) for id_, doc in docstore.added.items()),
+        # search() returns a "not found" string for ids missing from the store
+        ((id_, doc.page_content) for id_, doc in removed if not isinstance(doc, str)),
+    )
+
+def reciprocal_rank_fusion(rankings: List[List[str]], k: int = RRF_K) -> List[str]:
+    """Fuses ranked id lists: each id scores sum(1 / (k + rank)) over the lists it appears in."""
+    scores = defaultdict(float)
+    for ranking in rankings:
+        for rank, id_ in enumerate(ranking, start=1):
+            scores[id_] += 1.0 / (k + rank)
+    return sorted(scores, key=scores.get, reverse=True)
@@ -0,0 +1,184 @@
+import os
+import json
+import sqlite3
+import threading
+from collections.abc import Mapping
+from typing import Dict, Iterable, List, Union
+
+from langchain_community.docstore.base import AddableMixin, Docstore
+from langchain_core.documents import Document
+
+CHUNK_STORE_FILE = "docstore.sqlite"
+
+class SQLiteDocstore(Docstore):
+    """Docstore backed by SQLite; chunks are read on demand instead of unpickled up front.
+
+    Read-only instances can be opened by many processes at once and share the
+    OS page cache.
+    """
+
+    def __init__(self, path: str, read_only: bool = False):
+        self.path = path
+        self.read_only = read_only
+        self._lock = threading.Lock()
+        if read_only:
+            self._conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True, check_same_thread=False)
+        else:
+            self._conn = sqlite3.connect(path, check_same_thread=False)
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS chunks (id TEXT PRIMARY KEY, text TEXT NOT NULL, metadata TEXT NOT NULL)"
+            )
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS positions (position INTEGER PRIMARY KEY, id TEXT NOT NULL)"
+            )
+            self._conn.commit()
+
+    def search(self, search: str) -> Union[str, Document]:
+        with self._lock:
+            row = self._conn.execute("SELECT text, metadata FROM chunks WHERE id = ?", (search,)).fetchone()
+        if row is None:
+            return f"ID {search} not found."
+        return Document(id=search, page_content=row[0], metadata=json.loads(row[1]))
+
+    def add(self, texts: Dict[str, Document]) -> None:
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO chunks (id, text, metadata) VALUES (?, ?, ?)",
+                [(id_, doc.page_content, json.dumps(doc.metadata, default=str)) for id_, doc in texts.items()],
+            )
+            self._conn.commit()
+
+    def delete(self, ids: List) -> None:
+        with self._lock:
+            self._conn.executemany("DELETE FROM chunks WHERE id = ?", [(id_,) for id_ in ids])
+            self._conn.commit()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM chunks").fetchone()[0]
+
+    def iter_documents(self, batch_size: int = 1000):
+        """Yields (id, Document) for every stored chunk, reading batch_size rows at a time."""
+        with self._lock:
+            cursor = self._conn.execute("SELECT id, text, metadata FROM chunks")
+            rows = cursor.fetchmany(batch_size)
+        while rows:
+            for id_, text, metadata in rows:
+                yield id_, Document(id=id_, page_content=text, metadata=json.loads(metadata))
+            with self._lock:
+                rows = cursor.fetchmany(batch_size)
+
+    def load_mapping(self) -> Dict[int, str]:
+        """Returns the FAISS position -> docstore id mapping."""
+        with self._lock:
+            return dict(self._conn.execute("SELECT position, id FROM positions"))
+
+    def save_mapping(self, index_to_docstore_id: Dict[int, str]) -> None:
+        with self._lock:
+            self._write_mapping(index_to_docstore_id)
+            self._conn.commit()
+
+    def apply(self, added: Dict[str, Document], deleted: Iterable[str], index_to_docstore_id: Dict[int, str]) -> None:
+        """Deletes and adds chunks and replaces the id mapping in one transaction."""
+        with self._lock, self._conn:
+            self._conn.executemany("DELETE FROM chunks WHERE id = ?", [(id_,) for id_ in deleted])
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO chunks (id, text, metadata) VALUES (?, ?, ?)",
+                [(id_, doc.page_content, json.dumps(doc.metadata, default=str)) for id_, doc in added.items()],
+            )
+            self._write_mapping(index_to_docstore_id)
+
+    def _write_mapping(self, index_to_docstore_id: Dict[int, str]) -> None:
+        self._conn.execute("DELETE FROM positions")
+        self._conn.executemany(
+            "INSERT INTO positions (position, id) VALUES (?, ?)",
+            list(index_to_docstore_id.items()),
+        )
+
+    def close(self) -> None:
+        self._conn.close()
+
+class StagedDocstore(Docstore, AddableMixin):
+    """Writable view of a SQLiteDocstore that keeps changes in memory until commit().
+
+    Incremental builds read existing chunks from SQLite on demand and hold only
+    the chunks they add, instead of loading the whole store.
+    """
+
+    def __init__(self, store: SQLiteDocstore):
+        self.store = store
+        self.added: Dict[str, Document] = {}
+        self.deleted = set()
+
+    def search(self, search: str) -> Union[str, Document]:
+        if search in self.added:
+            return self.added[search]
+        if search in self.deleted:
+            return f"ID {search} not found."
+        return self.store.search(search)
+
+    def add(self, texts: Dict[str, Document]) -> None:
+        self.added.update(texts)
+        self.deleted.difference_update(texts)
+
+    def delete(self, ids: List) -> None:
+        for id_ in ids:
+            # A chunk added and deleted in the same build never reaches SQLite
+            if self.added.pop(id_, None) is None:
+                self.deleted.add(id_)
+
+    def commit(self, index_to_docstore_id: Dict[int, str]) -> None:
+        """Writes the staged chunks and the new position -> id mapping to SQLite."""
+        self.store.apply(self.added, self.deleted, index_to_docstore_id)
+        self.added, self.deleted = {}, set()
+
+class PositionMap(Mapping):
+    """Read-only FAISS position -> docstore id view that looks up SQLite per access."""
+
+    def __init__(self, store: SQLiteDocstore):
+        self._store = store
+
+    def __getitem__(self, position) -> str:
+        # FAISS hands back numpy integers, which sqlite3 cannot bind
+        with self._store._lock:
+            row = self._store._conn.execute(
+                "SELECT id FROM positions WHERE position = ?", (int(position),)
+            ).fetchone()
+        if row is None:
+            raise KeyError(position)
+        return row[0]
+
+    def __len__(self) -> int:
+        with self._store._lock:
+            return self._store._conn.execute("SELECT COUNT(*) FROM positions").fetchone()[0]
+
+    def __iter__(self):
+        with self._store._lock:
+            positions = [row[0] for row in self._store._conn.execute("SELECT position FROM positions ORDER BY position")]
+        return iter(positions)
+
+def open_staged(db_path: str):
+    """Opens the chunk store for an incremental build as a (StagedDocstore, mapping) pair."""
+    store = SQLiteDocstore(os.path.join(db_path, CHUNK_STORE_FILE))
+    return StagedDocstore(store), store.load_mapping()
+
+def write_chunk_store(vector_db, db_path: str) -> str:
+    """Writes the store's chunks and id mapping to db_path/docstore.sqlite, replacing it atomically."""
+    path = os.path.join(db_path, CHUNK_STORE_FILE)
+    tmp_path = path + ".tmp"
+    if os.path.exists(tmp_path):
+        os.remove(tmp_path)
+
+    store = SQLiteDocstore(tmp_path)
+    batch = {}
+    for id_ in vector_db.index_to_docstore_id.values():
+        batch[id_] = vector_db.docstore.search(id_)
+        if len(batch) >= 1000:
+            store.add(batch)
+            batch = {}
+    store.add(batch)
+    store.save_mapping(vector_db.index_to_docstore_id)
+    store.close()
+
+    os.replace(tmp_path, path)
+    return path
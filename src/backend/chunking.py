@@ -0,0 +1,153 @@
+import os
+import re
+import json
+from typing import List
+
+from bs4 import BeautifulSoup
+from langchain_core.documents import Document
+from langchain_text_splitters import MarkdownHeaderTextSplitter, RecursiveCharacterTextSplitter
+
+from backend.html_distill import distill_html
+
+CHUNKING_STRATEGIES = ("recursive", "structured")
+CHUNK_SIZE = 1000
+CHUNK_OVERLAP = 200
+MARKDOWN_HEADERS = [("#", "h1"), ("##", "h2"), ("###", "h3")]
+
+_MARKDOWN_HEADER = re.compile(r"^#{1,6} ", re.MULTILINE)
+# Template tags ({% block %}, {# comment #}) in Jinja pages; {{ expressions }} are kept
+_JINJA_STATEMENT = re.compile(r"\{%.*?%\}|\{#.*?#\}", re.DOTALL)
+
+def default_chunking_strategy() -> str:
+    """Reads CHUNKING_STRATEGY (recursive | structured); structured is the default."""
+    strategy = os.getenv("CHUNKING_STRATEGY", "structured")
+    if strategy not in CHUNKING_STRATEGIES:
+        raise ValueError(f"Unknown chunking strategy {strategy!r}, expected one of {CHUNKING_STRATEGIES}")
+    return strategy
+
+def get_splitter(strategy: str = None):
+    """Returns the splitter for a chunking strategy; both expose split_documents()."""
+    strategy = strategy or default_chunking_strategy()
+    if strategy == "recursive":
+        return RecursiveCharacterTextSplitter(chunk_size=CHUNK_SIZE, chunk_overlap=CHUNK_OVERLAP)
+    return StructuredSplitter()
+
+class StructuredSplitter:
+    """Splits documents along their own structure instead of at fixed character counts.
+
+    JSON gets one chunk per entity (e.g. per API endpoint), markdown is split by
+    header hierarchy with small sibling sections merged up to chunk_size, and HTML
+    gets one chunk per form plus its remaining content split by headings. Only
+    pieces still larger than chunk_size fall back to the recursive splitter, without
+    overlap: structural boundaries make it unnecessary.
+    """
+
+    def __init__(self, chunk_size: int = CHUNK_SIZE):
+        self.chunk_size = chunk_size
+        self._fallback = RecursiveCharacterTextSplitter(chunk_size=chunk_size, chunk_overlap=0)
+        self._markdown = MarkdownHeaderTextSplitter(MARKDOWN_HEADERS, strip_headers=False)
+
+    def split_documents(self, documents: List[Document]) -> List[Document]:
+        chunks = []
+        for doc in documents:
+            ext = os.path.splitext(doc.metadata.get("source", ""))[1].lower()
+            if ext == ".json":
+                pieces = self._split_json(doc.page_content)
+            elif ext == ".html":
+                pieces = self._split_html(doc.page_content)
+            elif ext == ".md" or _MARKDOWN_HEADER.search(doc.page_content):
+                pieces = self._split_markdown(doc.page_content)
+            else:
+                pieces = [(doc.page_content, None)]
+            for text, section in pieces:
+                metadata = dict(doc.metadata, section=section) if section else doc.metadata
+                chunks.extend(self._fit(Document(page_content=text, metadata=dict(metadata))))
+        return chunks
+
+    def _fit(self, doc: Document) -> List[Document]:
+        if not doc.page_content.strip():
+            return []
+        if len(doc.page_content) <= self.chunk_size:
+            return [doc]
+        return self._fallback.split_documents([doc])
+
+    def _split_json(self, text: str):
+        """One piece per member of each object-of-objects (or list of objects); scalars become a shared header."""
+        try:
+            data = json.loads(text)
+        except ValueError:
+            return [(text, None)]
+
+        if isinstance(data, list):
+            data = {"items": data}
+        if not isinstance(data, dict):
+            return [(text, None)]
+
+        header = "\n".join(f"{key}: {value}" for key, value in data.items() if not isinstance(value, (dict, list)))
+        pieces = []
+        for key, value in data.items():
+            if isinstance(value, dict) and value and all(isinstance(v, dict) for v in value.values()):
+                entities = value.items()
+            elif isinstance(value, list) and value and all(isinstance(v, dict) for v in value):
+                entities = ((f"{key}[{i}]", v) for i, v in enumerate(value))
+            elif isinstance(value, (dict, list)):
+                pieces.append((f"{header}\n{key}: {json.dumps(value, indent=2)}".strip(), key))
+                continue
+            else:
+                continue
+            for name, entity in entities:
+                pieces.append((f"{header}\n{key} {name}:\n{json.dumps(entity, indent=2)}".strip(), str(name)))
+        return pieces or [(header or text, None)]
+
+    def _split_markdown(self, text: str):
+        """Sections per header; consecutive sections under the same parent are merged while they fit."""
+        pieces = []
+        current, current_parent, current_section = "", None, None
+        for section in self._markdown.split_text(text):
+            headers = [section.metadata[level] for _, level in MARKDOWN_HEADERS if level in section.metadata]
+            parent = tuple(headers[:-1])
+            if current and parent == current_parent and len(current) + len(section.page_content) + 2 <= self.chunk_size:
+                current += "\n\n" + section.page_content
+                current_section = " > ".join(parent) or current_section
+                continue
+            if current:
+                pieces.append((current, current_section))
+            # Restore the ancestor headings the splitter cut off, so the section keeps its context
+            lines = {line.strip() for line in section.page_content.splitlines()}
+            ancestors = "\n".join(
+                heading for heading in (f"{'#' * (depth + 1)} {title}" for depth, title in enumerate(parent))
+                if heading not in lines
+            )
+            current = f"{ancestors}\n{section.page_content}".strip()
+            current_parent, current_section = parent, " > ".join(headers) or None
+        if current:
+            pieces.append((current, current_section))
+        return pieces
+
+    def _split_html(self, html: str):
+        """One piece per form (its text plus a locator listing); the rest of the page split by headings."""
+        soup = BeautifulSoup(html, "html.parser")
+        for element in soup(["script", "style", "svg", "noscript"]):
+            element.decompose()
+        title = soup.title.get_text(" ", strip=True) if soup.title else ""
+        prefix = f"Page: {title}\n" if title else ""
+
+        pieces = []
+        for number, form in enumerate(soup.find_all("form"), start=1):
+            name = form.get("id") or form.get("name") or f"form {number}"
+            text = " ".join(form.get_text(" ", strip=True).split())
+            pieces.append((f"{prefix}Form {name}: {text}\n{distill_html(str(form))}", f"form {name}"))
+            form.decompose()
+
+        # Turn headings into markdown headers and reuse the markdown splitting for the rest
+        for heading in soup.find_all(re.compile(r"^h[1-6]$")):
+            level = min(int(heading.name[1]), len(MARKDOWN_HEADERS))
+            heading.replace_with(f"\n{'#' * level} {' '.join(heading.get_text(' ', strip=True).split())}\n")
+        body = soup.body or soup
+        for statement in body.find_all(string=_JINJA_STATEMENT):
+            statement.replace_with(_JINJA_STATEMENT.sub("", statement))
+        lines = (" ".join(line.split()) for line in body.get_text("\n").splitlines())
+        text = "\n".join(line for line in lines if line)
+        for piece, section in self._split_markdown(text):
+            pieces.append((prefix + piece, section))
+        return pieces
@@ -0,0 +1,120 @@
+import os
+import logging
+from typing import List, NamedTuple
+
+from langchain_core.documents import Document
+
+from backend.tokens import count_tokens
+
+TEST_CASE_CONTEXT_TOKENS = 1500
+SCRIPT_CONTEXT_TOKENS = 800
+# Shorter shared edges are treated as coincidence, not splitter overlap
+MIN_OVERLAP_CHARS = 20
+
+logger = logging.getLogger(__name__)
+
+class ContextBudget(NamedTuple):
+    """Token budgets for the retrieved context of each prompt."""
+    test_cases: int = TEST_CASE_CONTEXT_TOKENS
+    scripts: int = SCRIPT_CONTEXT_TOKENS
+
+def default_context_budget() -> ContextBudget:
+    """Builds the budgets from CONTEXT_TOKENS_* environment variables."""
+    return ContextBudget(
+        test_cases=int(os.getenv("CONTEXT_TOKENS_TEST_CASES", str(TEST_CASE_CONTEXT_TOKENS))),
+        scripts=int(os.getenv("CONTEXT_TOKENS_SCRIPTS", str(SCRIPT_CONTEXT_TOKENS))),
+    )
+
+class PackedContext(NamedTuple):
+    """Context text for a prompt plus what went into it."""
+    text: str
+    tokens: int
+    blocks: int
+    dropped: int
+
+def _overlap(left: str, right: str) -> int:
+    """Length of the longest suffix of left that is a prefix of right."""
+    for size in range(min(len(left), len(right)) - 1, MIN_OVERLAP_CHARS - 1, -1):
+        if left.endswith(right[:size]):
+            return size
+    return 0
+
+def _join(left: str, right: str):
+    """Merges two chunks of one source if they overlap or one contains the other, else None."""
+    if right in left:
+        return left
+    if left in right:
+        return right
+    size = _overlap(left, right)
+    if size:
+        return left + right[size:]
+    size = _overlap(right, left)
+    if size:
+        return right + left[size:]
+    return None
+
+def merge_chunks(docs: List[Document]) -> List[Document]:
+    """Deduplicates and merges overlapping chunks of the same source.
+
+    Chunks produced by the splitter share up to CHUNK_OVERLAP characters with
+    their neighbours; retrieving both used to put that text in the prompt twice.
+    A merged block keeps the rank of its best chunk, so the result is still
+    ordered by relevance.
+    """
+    blocks = []  # (source, text, metadata), in rank order
+    for doc in docs:
+        source = doc.metadata.get("source", "unknown")
+        text, metadata, position = doc.page_content, doc.metadata, len(blocks)
+        # A grown block may now bridge to another block, so keep merging until nothing joins
+        while True:
+            for i, (block_source, block_text, block_metadata) in enumerate(blocks):
+                joined = _join(block_text, text) if block_source == source else None
+                if joined is not None:
+                    break
+            else:
+                break
+            del blocks[i]
+            if i < position:
+                text, metadata, position = joined, block_metadata, i
+            else:
+                text, position = joined, min(position, len(blocks))
+        blocks.insert(position, (source, text, metadata))
+    return [Document(page_content=text, metadata=metadata) for _, text, metadata in blocks]
+
+def _truncate(text: str, budget: int) -> str:
+    """Cuts text down to roughly budget tokens, keeping the beginning."""
+    while text and count_tokens(text) > budget:
+        text = text[:int(len(text) * 0.9)]
+    return text
+
+def pack_context(docs: List[Document], budget: int, with_sources: bool = False) -> PackedContext:
+    """Merges the retrieved chunks and packs them greedily, by relevance, into budget tokens.
+
+    Blocks that do not fit are skipped in favour of smaller, lower-ranked ones.
+    If even the best block is larger than the budget, its beginning is used.
+    """
+    def render(doc: Document) -> str:
+        if with_sources:
+            return doc.page_content + f"\n(Source: {doc.metadata.get('source', 'unknown')})"
+        return doc.page_content
+
+    blocks = merge_chunks(docs)
+    packed, used = [], 0
+    for doc in blocks:
+        text = render(doc)
+        tokens = count_tokens(text)
+        if used + tokens <= budget:
+            packed.append(text)
+            used += tokens
+
+    if not packed and blocks:
+        truncated = _truncate(blocks[0].page_content, budget)
+        packed.append(render(Document(page_content=truncated, metadata=blocks[0].metadata)))
+
+    text = "\n\n".join(packed)
+    context = PackedContext(text, count_tokens(text), len(packed), len(blocks) - len(packed))
+    logger.info(
+        "Packed %d retrieved chunks into %d blocks, %d context tokens (budget %d, %d blocks dropped)",
+        len(docs), context.blocks, context.tokens, budget, context.dropped,
+    )
+    return context
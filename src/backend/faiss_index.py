@@ -0,0 +1,168 @@
+import os
+import math
+import random
+from typing import NamedTuple, Optional
+
+import faiss
+import numpy as np
+
+INDEX_TYPES = ("flat", "ivf_flat", "hnsw", "ivf_pq")
+# Fields that change the index structure; nprobe/ef_search can change at query time
+BUILD_FIELDS = ("type", "nlist", "pq_m", "pq_nbits", "hnsw_m", "ef_construction")
+TRAINING_POINTS_PER_CENTROID = 64
+REBUILD_BATCH_SIZE = 1024
+# Retrain IVF indexes once the corpus has grown this many times past the training size
+RETRAIN_GROWTH = 2
+
+class IndexSpec(NamedTuple):
+    """FAISS index type plus its build-time and search-time parameters."""
+    type: str = "flat"
+    nlist: Optional[int] = None  # IVF cells; derived from the corpus size when None
+    pq_m: int = 16  # PQ sub-quantizers, must divide the embedding dimension
+    pq_nbits: int = 8
+    hnsw_m: int = 32
+    ef_construction: int = 80
+    nprobe: int = 8
+    ef_search: int = 64
+
+    @property
+    def build_key(self) -> list:
+        return [getattr(self, field) for field in BUILD_FIELDS]
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "IndexSpec":
+        return cls(**{key: value for key, value in data.items() if key in cls._fields})
+
+def default_index_spec() -> IndexSpec:
+    """Builds the index settings from FAISS_* environment variables."""
+    nlist = os.getenv("FAISS_NLIST")
+    return IndexSpec(
+        type=os.getenv("FAISS_INDEX_TYPE", "flat"),
+        nlist=int(nlist) if nlist else None,
+        nprobe=int(os.getenv("FAISS_NPROBE", "8")),
+        ef_search=int(os.getenv("FAISS_EF_SEARCH", "64")),
+    )
+
+def resolve_spec(spec: IndexSpec, num_vectors: int, dim: int) -> IndexSpec:
+    """Fills in derived parameters and falls back to flat when the corpus is too small to train on."""
+    if spec.type not in INDEX_TYPES:
+        raise ValueError(f"Unknown FAISS index type {spec.type!r}, expected one of {INDEX_TYPES}")
+    if spec.type in ("flat", "hnsw"):
+        return spec
+
+    nlist = spec.nlist or max(1, int(4 * math.sqrt(num_vectors)))
+    nlist = max(1, min(nlist, num_vectors // TRAINING_POINTS_PER_CENTROID or 1))
+    if spec.type == "ivf_pq" and (num_vectors < 2 ** spec.pq_nbits or dim % spec.pq_m):
+        # PQ k-means needs at least 2**nbits training points per sub-quantizer
+        return spec._replace(type="flat", nlist=None)
+    return spec._replace(nlist=nlist)
+
+def needs_retrain(requested: IndexSpec, resolved: IndexSpec, trained_on: int, num_vectors: int, dim: int) -> bool:
+    """Whether an index built as `resolved` from trained_on vectors should be rebuilt from `requested`.
+
+    True when the corpus now supports a different type than the one built (e.g. it
+    was too small for ivf_pq and fell back to flat) or an IVF index has outgrown
+    the nlist and centroids it was trained with.
+    """
+    if requested.type == "flat" or not num_vectors:
+        return False
+    if resolve_spec(requested, num_vectors, dim).type != resolved.type:
+        return True
+    return resolved.type.startswith("ivf") and num_vectors > RETRAIN_GROWTH * max(trained_on, 1)
+
+def create_index(spec: IndexSpec, dim: int):
+    """Creates an empty (possibly untrained) L2 index for a resolved spec."""
+    if spec.type == "flat":
+        return faiss.IndexFlatL2(dim)
+    if spec.type == "hnsw":
+        index = faiss.IndexHNSWFlat(dim, spec.hnsw_m)
+        index.hnsw.efConstruction = spec.ef_construction
+        return index
+
+    quantizer = faiss.IndexFlatL2(dim)
+    if spec.type == "ivf_flat":
+        return faiss.IndexIVFFlat(quantizer, dim, spec.nlist)
+    return faiss.IndexIVFPQ(quantizer, dim, spec.nlist, spec.pq_m, spec.pq_nbits)
+
+def set_search_params(index, spec: IndexSpec):
+    """Applies the query-time knobs (nprobe for IVF, efSearch for HNSW)."""
+    if isinstance(index, faiss.IndexHNSW):
+        index.hnsw.efSearch = spec.ef_search
+    ivf = faiss.try_extract_index_ivf(index)
+    if ivf is not None:
+        ivf.nprobe = spec.nprobe
+
+def search_parameters(index, spec: IndexSpec):
+    """The spec's query-time knobs as per-search faiss.SearchParameters, or None for flat indexes."""
+    if isinstance(index, faiss.IndexHNSW):
+        return faiss.SearchParametersHNSW(efSearch=spec.ef_search)
+    if faiss.try_extract_index_ivf(index) is not None:
+        return faiss.SearchParametersIVF(nprobe=spec.nprobe)
+    return None
+
+class TunedIndex:
+    """View of a FAISS index whose search() passes fixed SearchParameters.
+
+    Lets one caller search a shared index with its own nprobe/efSearch without
+    changing the values stored on the index for everyone else.
+    """
+
+    def __init__(self, index, params):
+        self._index = index
+        self._params = params
+
+    def __getattr__(self, name):
+        return getattr(self._index, name)
+
+    def search(self, x, k, **kwargs):
+        return self._index.search(x, k, params=self._params, **kwargs)
+
+def index_type_of(index) -> str:
+    if isinstance(index, faiss.IndexHNSW):
+        return "hnsw"
+    ivf = faiss.try_extract_index_ivf(index)
+    if ivf is not None:
+        # try_extract_index_ivf returns the IndexIVF base class; downcast to tell PQ from Flat
+        return "ivf_pq" if isinstance(faiss.downcast_index(ivf), faiss.IndexIVFPQ) else "ivf_flat"
+    return "flat"
+
+def _vectors_at(vector_db, embeddings, positions):
+    """Returns the stored vectors at the given positions.
+
+    Flat and HNSW indexes keep exact vectors; IVF indexes don't reconstruct cheaply,
+    so their vectors are re-embedded (hits in the embedding cache).
+    """
+    if isinstance(vector_db.index, (faiss.IndexFlat, faiss.IndexHNSWFlat)):
+        return vector_db.index.reconstruct_batch(np.asarray(positions, dtype=np.int64))
+    texts = [vector_db.docstore.search(vector_db.index_to_docstore_id[i]).page_content for i in positions]
+    return np.asarray(embeddings.embed_documents(texts), dtype=np.float32)
+
+def rebuild_index(vector_db, spec: IndexSpec, embeddings, drop_ids=()) -> IndexSpec:
+    """Rebuilds vector_db.index as `spec`, optionally dropping the given docstore ids.
+
+    Trainable indexes are trained on a random sample; vectors are then re-added in
+    batches, so peak memory is bounded by the sample plus one batch. Returns the
+    resolved spec that was actually built.
+    """
+    drop_ids = set(drop_ids)
+    positions = [i for i in sorted(vector_db.index_to_docstore_id) if vector_db.index_to_docstore_id[i] not in drop_ids]
+    dim = vector_db.index.d
+    spec = resolve_spec(spec, len(positions), dim)
+
+    index = create_index(spec, dim)
+    if not index.is_trained and positions:
+        sample_size = min(len(positions), spec.nlist * TRAINING_POINTS_PER_CENTROID * 4)
+        if spec.type == "ivf_pq":
+            sample_size = max(sample_size, min(len(positions), 2 ** spec.pq_nbits * TRAINING_POINTS_PER_CENTROID))
+        sample = sorted(random.Random(0).sample(positions, sample_size))
+        index.train(_vectors_at(vector_db, embeddings, sample))
+
+    for start in range(0, len(positions), REBUILD_BATCH_SIZE):
+        index.add(_vectors_at(vector_db, embeddings, positions[start:start + REBUILD_BATCH_SIZE]))
+    set_search_params(index, spec)
+
+    if drop_ids:
+        vector_db.docstore.delete(list(drop_ids))
+    vector_db.index_to_docstore_id = {new: vector_db.index_to_docstore_id[old] for new, old in enumerate(positions)}
+    vector_db.index = index
+    return spec
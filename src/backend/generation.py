@@ -1,10 +1,233 @@
+import re
+import json
+import time
+import logging
+import random
+import asyncio
+import threading
+from collections import OrderedDict
+from functools import partial
+from typing import Callable, List, NamedTuple, Optional
+
+import numpy as np
+from langchain_core.documents import Document
 from langchain_core.prompts import PromptTemplate
 from langchain_core.output_parsers import StrOutputParser
-from langchain_core.runnables import RunnablePassthrough
+from langchain_core.runnables import RunnableLambda, RunnablePassthrough
+
+from backend.bm25 import reciprocal_rank_fusion
+from backend.context_packing import default_context_budget, pack_context
+from backend.html_distill import distill_html
+from backend.llm_cache import cached_llm, stream_llm
+from backend.page_index import format_pages, select_pages
+from backend.rerank import default_rerank_config, rerank_documents
+from backend.tokens import count_tokens
+
+BATCH_MAX_CONCURRENCY = 5
+BATCH_MAX_RETRIES = 4
+BATCH_BASE_DELAY_SECONDS = 2.0
+RETRIEVAL_CACHE_SIZE = 256
+# Cosine similarity above which a new query reuses the hits of a cached one; None disables the tier
+SEMANTIC_CACHE_THRESHOLD = 0.97
+# Candidates per ranking fed to reciprocal rank fusion, as a multiple of k
+HYBRID_CANDIDATES = 4
+
+class RetrievalCache:
+    """LRU cache of similarity-search results keyed by (normalized query, k, mode, index version).
+
+    The optional semantic tier also serves a query whose embedding is within
+    `semantic_threshold` cosine similarity of a cached query with the same k.
+    All entries are dropped as soon as a different index version is seen, i.e.
+    after the knowledge base is rebuilt.
+    """
+
+    def __init__(self, max_size: int = RETRIEVAL_CACHE_SIZE, semantic_threshold: float = SEMANTIC_CACHE_THRESHOLD):
+        self.max_size = max_size
+        self.semantic_threshold = semantic_threshold
+        self.hits = 0
+        self.semantic_hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()  # key -> (normalized query embedding or None, docs)
+        self._version = None
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def normalize(query: str) -> str:
+        return " ".join(query.lower().split())
+
+    def _sync_version(self, version):
+        if version != self._version:
+            self._entries.clear()
+            self._version = version
+
+    def get(self, query: str, k: int, version, embed=None, mode: str = "vector"):
+        """Returns (cached documents or None, query embedding or None).
+
+        `embed` is called to embed the query only when the exact tier misses and the
+        semantic tier is enabled; its result is returned for reuse by the search.
+        `mode` keeps results of different retrieval strategies apart; only plain
+        vector results use the semantic tier, since near-identical embeddings can
+        hide the keyword (e.g. SAVE10 vs SAVE20) that BM25 and the reranker see.
+        """
+        key = (self.normalize(query), k, mode, version)
+        with self._lock:
+            self._sync_version(version)
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key][1], None
+
+        embedding = None
+        if embed is not None and self.semantic_threshold is not None and mode == "vector":
+            embedding = embed(query)
+            query_vector = _unit(embedding)
+            with self._lock:
+                best_key, best_score = None, self.semantic_threshold
+                for cached_key, (cached_vector, _) in self._entries.items():
+                    if cached_key[1:3] == (k, mode) and cached_vector is not None:
+                        score = float(np.dot(query_vector, cached_vector))
+                        if score >= best_score:
+                            best_key, best_score = cached_key, score
+                if best_key is not None:
+                    self._entries.move_to_end(best_key)
+                    self.semantic_hits += 1
+                    return self._entries[best_key][1], embedding
+
+        with self._lock:
+            self.misses += 1
+        return None, embedding
+
+    def put(self, query: str, k: int, version, docs, embedding=None, mode: str = "vector"):
+        key = (self.normalize(query), k, mode, version)
+        with self._lock:
+            self._sync_version(version)
+            self._entries[key] = (_unit(embedding) if embedding is not None else None, docs)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+def _unit(vector):
+    vector = np.asarray(vector, dtype=np.float32)
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else vector
+
+retrieval_cache = RetrievalCache()
+
+logger = logging.getLogger(__name__)
+
+def _log_prompt_tokens(label: str):
+    """Pass-through step that logs the size of the rendered prompt."""
+    def log(prompt_value):
+        logger.info("%s prompt: %d tokens", label, count_tokens(prompt_value.to_string()))
+        return prompt_value
+    return RunnableLambda(log)
+
+class FenceStripper:
+    """Incrementally removes ```python / ``` fences and surrounding whitespace from streamed text.
 
-def generate_test_cases(llm, vector_db, requirement: str):
-    """Generates test cases based on the requirement and knowledge base."""
-    retriever = vector_db.as_retriever(search_kwargs={"k": 5})
+    Emits the same text as `s.replace("```python", "").replace("```", "").strip()`
+    on the full completion, holding back only a possible partial fence or trailing
+    whitespace until the next token decides it.
+    """
+    FENCE = "```python"
+
+    def __init__(self):
+        self._buffer = ""
+        self._started = False
+
+    def _clean(self, text: str) -> str:
+        return text.replace("```python", "").replace("```", "")
+
+    def feed(self, token: str) -> str:
+        self._buffer += token
+        # Keep back a suffix that could still grow into a fence
+        hold = 0
+        for size in range(min(len(self.FENCE), len(self._buffer)), 0, -1):
+            if self.FENCE.startswith(self._buffer[-size:]):
+                hold = size
+                break
+        ready = self._clean(self._buffer[:len(self._buffer) - hold])
+        self._buffer = self._buffer[len(self._buffer) - hold:]
+
+        if not self._started:
+            ready = ready.lstrip()
+            self._started = bool(ready)
+        # Trailing whitespace is only emitted once more text follows it
+        body = ready.rstrip()
+        self._buffer = ready[len(body):] + self._buffer
+        return body
+
+    def flush(self) -> str:
+        text = self._clean(self._buffer).rstrip()
+        if not self._started:
+            text = text.lstrip()
+        self._buffer = ""
+        return text
+
+def _vector_search(vector_db, query: str, k: int, embedding=None):
+    if embedding is not None:
+        return vector_db.similarity_search_by_vector(embedding, k=k)
+    return vector_db.similarity_search(query, k=k)
+
+def hybrid_search(vector_db, query: str, k: int, embedding=None):
+    """Fuses FAISS and BM25 rankings with reciprocal rank fusion and returns the top k chunks.
+
+    Each ranking contributes k * HYBRID_CANDIDATES candidates. Stores saved before
+    the keyword index existed fall back to vector search.
+    """
+    keyword_index = getattr(vector_db, "keyword_index", None)
+    candidates = k * HYBRID_CANDIDATES
+    vector_docs = _vector_search(vector_db, query, candidates if keyword_index else k, embedding)
+    if keyword_index is None:
+        return vector_docs
+
+    docs_by_id = {doc.id or doc.page_content: doc for doc in vector_docs}
+    keyword_ids = [id_ for id_, _ in keyword_index.search(query, candidates)]
+    fused = reciprocal_rank_fusion([list(docs_by_id), keyword_ids])
+    docs = []
+    for id_ in fused[:k]:
+        doc = docs_by_id.get(id_) or vector_db.docstore.search(id_)
+        if isinstance(doc, Document):
+            docs.append(doc)
+    return docs
+
+def retrieve_documents(vector_db, query: str, k: int, hybrid: bool = False, rerank: Optional[bool] = None):
+    """Similarity search (or hybrid BM25 + vector search) through the process-wide retrieval cache.
+
+    With reranking (rerank=True, or RERANK_ENABLED when None), RERANK_CANDIDATES
+    chunks are fetched and the cross-encoder picks the best k. Results that fell
+    back to the vector order because the time budget ran out are not cached.
+    """
+    config = default_rerank_config()
+    rerank = config.enabled if rerank is None else rerank
+    mode = ("hybrid" if hybrid else "vector") + ("+rerank" if rerank else "")
+    version = getattr(vector_db, "index_version", id(vector_db))
+    embed = vector_db.embeddings.embed_query if vector_db.embeddings is not None else None
+    docs, embedding = retrieval_cache.get(query, k, version, embed=embed, mode=mode)
+    if docs is not None:
+        return docs
+
+    search = hybrid_search if hybrid else _vector_search
+    docs = search(vector_db, query, max(k, config.candidates) if rerank else k, embedding)
+    if rerank:
+        result = rerank_documents(query, docs, k, config)
+        if result.timed_out:
+            return result.docs
+        docs = result.docs
+    retrieval_cache.put(query, k, version, docs, embedding=embedding, mode=mode)
+    return docs
+
+def _test_case_prompt_chain(vector_db):
+    """Retrieval + prompt rendering for test case generation (requirement -> PromptValue).
+
+    Retrieval is hybrid (BM25 + vector) so exact terms like coupon codes are found;
+    the retrieved chunks are merged and packed into the CONTEXT_TOKENS_TEST_CASES budget.
+    """
+    retriever = RunnableLambda(partial(retrieve_documents, vector_db, k=5, hybrid=True))
     
     template = """You are an expert QA engineer. Based on the following context from project documentation, 
     generate comprehensive test cases for the given requirement.
@@ -27,21 +250,51 @@ def generate_test_cases(llm, vector_db, requirement: str):
     
     prompt = PromptTemplate.from_template(template)
     
+    budget = default_context_budget().test_cases
+
     def format_docs(docs):
-        return "\n\n".join(doc.page_content + f"\n(Source: {doc.metadata.get('source', 'unknown')})" for doc in docs)
+        return pack_context(docs, budget, with_sources=True).text
 
+    return {"context": retriever | format_docs, "requirement": RunnablePassthrough()} | prompt | _log_prompt_tokens("Test case")
+
+def generate_test_cases(llm, vector_db, requirement: str, use_cache: bool = True):
+    """Generates test cases based on the requirement and knowledge base.
+
+    With use_cache, an identical rendered prompt is answered from the LLM response cache.
+    """
     rag_chain = (
-        {"context": retriever | format_docs, "requirement": RunnablePassthrough()}
-        | prompt
-        | llm
+        _test_case_prompt_chain(vector_db)
+        | cached_llm(llm, enabled=use_cache)
         | StrOutputParser()
     )
     
     return rag_chain.invoke(requirement)
 
-def generate_selenium_script(llm, vector_db, test_case: str, html_content: str):
-    """Generates a Selenium script for a specific test case."""
-    retriever = vector_db.as_retriever(search_kwargs={"k": 3})
+def stream_test_cases(llm, vector_db, requirement: str, use_cache: bool = True):
+    """Streaming variant of generate_test_cases: yields the completion as tokens arrive."""
+    prompt_value = _test_case_prompt_chain(vector_db).invoke(requirement)
+    yield from stream_llm(llm, prompt_value, enabled=use_cache)
+
+def _locator_context(test_case: str, html_content: Optional[str], page_index: Optional[dict]) -> str:
+    """Locator map of the uploaded page plus the indexed pages relevant to the test case."""
+    sections = []
+    if html_content:
+        # Fall back to the raw markup for fragments without any interactive elements
+        sections.append(distill_html(html_content) or html_content)
+    if page_index:
+        names = select_pages(page_index, test_case)
+        if names:
+            sections.append(format_pages(page_index, names))
+    return "\n\n".join(sections)
+
+def _selenium_prompt_chain(vector_db, html_content: Optional[str], page_index: Optional[dict] = None):
+    """Retrieval + prompt rendering for script generation (test case -> PromptValue).
+
+    The raw HTML is reduced to a locator map of its interactive elements; with a
+    page_index, the maps of the pages relevant to the test case are added. The
+    documentation context is packed into the CONTEXT_TOKENS_SCRIPTS budget.
+    """
+    retriever = RunnableLambda(partial(retrieve_documents, vector_db, k=3))
     
     template = """You are an expert Selenium Python automation engineer.
     Generate a robust, self-contained, runnable Selenium script for the following test case.
@@ -49,7 +302,7 @@ def generate_selenium_script(llm, vector_db, test_case: str, html_content: str):
     Test Case:
     {test_case}
     
-    HTML Reference (for element selectors only):
+    Page Locator Map (interactive elements extracted from the target HTML, for element selectors only):
     {html_content}
     
     Relevant Documentation Context:
@@ -58,23 +311,27 @@ def generate_selenium_script(llm, vector_db, test_case: str, html_content: str):
     CRITICAL INSTRUCTIONS - READ CAREFULLY:
     
     1. **ANALYZE TEST DEPENDENCIES FIRST** (MOST IMPORTANT):
-       - Does this test require a logged-in user? → YES: Create a function to register/setup test user BEFORE running the test
-       - Does it need data in cart/database? → YES: Create helper functions to set up that data
-       - Example: Testing cart features? You MUST create a user first and log them in!
-       - Example: Testing checkout? You MUST create user + add items to cart first!
+       - Does this test require a logged-in user? Does it need items in the cart?
+       - Set these prerequisites up with the qa_fixtures module (HTTP-level, no browser), NOT through the UI:
+         from qa_fixtures import BASE_URL, new_user, register_user, login_session, add_to_cart, product_ids, inject_session, logged_in_driver
+         * logged_in_driver(driver, cart=[product ids]) registers a fresh user, logs in over HTTP,
+           fills the cart and injects the session cookie into the driver; returns the TestUser (username, email, password)
+         * product_ids() returns the ids of the products on the home page
+         * register_user(new_user()) creates a user without logging in (e.g. for login tests)
+       - Only drive /register, /login or "Add to Cart" through the browser when that flow IS the feature under test
        - Think step-by-step about what needs to exist before your test can run
     
     2. **Test Against Running Flask App**: 
        - Script MUST test against http://127.0.0.1:5000
-       - Define: base_url = "http://127.0.0.1:5000"
+       - Use BASE_URL from qa_fixtures (http://127.0.0.1:5000 unless QA_BASE_URL is set)
     
     3. **Do NOT Embed HTML**: 
-       - Use HTML reference ONLY to find element selectors (IDs, classes, names, text)
-       - Check the HTML carefully for EXACT button text, field names, etc.
+       - Use the locator map ONLY to find element selectors (IDs, names, labels, placeholders, text)
+       - Check the locator map carefully for EXACT button text, field names, etc.
     
     4. **Self-Contained & Intelligent**:
-       - Script should be runnable standalone with: python script.py
-       - Include ALL necessary setup (user creation, login, data preparation)
+       - Script should be runnable standalone with: python script.py (qa_fixtures is the only local import)
+       - Include ALL necessary setup (user creation, login, data preparation) via qa_fixtures
        - No external dependencies on existing data
     
     5. **Use Explicit Waits**: 
@@ -82,7 +339,7 @@ def generate_selenium_script(llm, vector_db, test_case: str, html_content: str):
        - Example: WebDriverWait(driver, 10).until(EC.presence_of_element_located((By.ID, "element_id")))
     
     6. **Accurate Selectors**:
-       - Examine the HTML carefully to find correct selectors
+       - Examine the locator map carefully to find correct selectors
        - Use exact text for buttons (e.g., "Sign In" not "Login" if that's what the HTML says)
        - Prefer IDs over XPath when available
     
@@ -104,6 +361,7 @@ def generate_selenium_script(llm, vector_db, test_case: str, html_content: str):
         from selenium.webdriver.support.ui import WebDriverWait
         from selenium.webdriver.support import expected_conditions as EC
         from selenium.common.exceptions import TimeoutException
+        from qa_fixtures import BASE_URL, logged_in_driver, product_ids  # plus any other fixture helpers used
         import uuid  # For generating unique test data
         import time  # For occasional sleeps if needed
     
@@ -119,25 +377,11 @@ def generate_selenium_script(llm, vector_db, test_case: str, html_content: str):
     EXAMPLE STRUCTURE for Login-Dependent Tests:
     ```
     # Imports
-    import uuid
     from selenium import webdriver
     from selenium.webdriver.common.by import By
     from selenium.webdriver.support.ui import WebDriverWait
     from selenium.webdriver.support import expected_conditions as EC
-    
-    BASE_URL = "http://127.0.0.1:5000"
-    
-    # Helper function to register user
-    def setup_test_user(driver):
-        # Try to login first to check if user exists
-        # If not, register the user
-        pass
-    
-    # Helper function to login
-    def login_user(driver, username, password):
-        driver.get(f"{{BASE_URL}}/login")
-        # Fill form and submit
-        pass
+    from qa_fixtures import BASE_URL, logged_in_driver, product_ids
     
     # Main execution
     if __name__ == "__main__":
@@ -145,10 +389,11 @@ def generate_selenium_script(llm, vector_db, test_case: str, html_content: str):
         try:
             driver = webdriver.Chrome()
             
-            # STEP 1: Setup prerequisites
-            setup_test_user(driver)
+            # STEP 1: Setup prerequisites over HTTP (user, login, cart)
+            user = logged_in_driver(driver, cart=product_ids()[:1])
             
             # STEP 2: Run the actual test
+            driver.get(f"{{BASE_URL}}/cart")
             # ... test logic here ...
             
             print("PASS: Test completed successfully")
@@ -164,16 +409,139 @@ def generate_selenium_script(llm, vector_db, test_case: str, html_content: str):
     
     prompt = PromptTemplate.from_template(template)
     
+    budget = default_context_budget().scripts
+
     def format_docs(docs):
-        return "\n\n".join(doc.page_content for doc in docs)
+        return pack_context(docs, budget).text
 
-    rag_chain = (
-        {"context": retriever | format_docs, "test_case": RunnablePassthrough(), "html_content": lambda x: html_content}
+    return (
+        {"context": retriever | format_docs, "test_case": RunnablePassthrough(), "html_content": partial(_locator_context, html_content=html_content, page_index=page_index)}
         | prompt
-        | llm
+        | _log_prompt_tokens("Selenium script")
+    )
+
+def generate_selenium_script(llm, vector_db, test_case: str, html_content: str, use_cache: bool = True, page_index: Optional[dict] = None):
+    """Generates a Selenium script for a specific test case.
+
+    With use_cache, an identical rendered prompt is answered from the LLM response cache.
+    With page_index (see backend.page_index), locators of the relevant pages are included.
+    """
+    rag_chain = (
+        _selenium_prompt_chain(vector_db, html_content, page_index)
+        | cached_llm(llm, enabled=use_cache)
         | StrOutputParser()
     )
     
     result = rag_chain.invoke(test_case)
+    return _strip_fences(result)
+
+def _strip_fences(result: str) -> str:
     # Clean up markdown formatting if present
     return result.replace("```python", "").replace("```", "").strip()
+
+def stream_selenium_script(llm, vector_db, test_case: str, html_content: str, use_cache: bool = True, page_index: Optional[dict] = None):
+    """Streaming variant of generate_selenium_script.
+
+    Yields script text as tokens arrive, with markdown fences stripped on the fly.
+    """
+    prompt_value = _selenium_prompt_chain(vector_db, html_content, page_index).invoke(test_case)
+    stripper = FenceStripper()
+    for token in stream_llm(llm, prompt_value, enabled=use_cache):
+        text = stripper.feed(token)
+        if text:
+            yield text
+    text = stripper.flush()
+    if text:
+        yield text
+
+class ScriptResult(NamedTuple):
+    """Outcome of generating one script in a batch."""
+    test_id: str
+    script: Optional[str]
+    error: Optional[str]
+    attempts: int
+    seconds: float
+
+def parse_test_cases(text: str) -> List[dict]:
+    """Extracts the JSON list of test cases from generate_test_cases() output.
+
+    Tolerates markdown fences and prose around the list. Raises ValueError if no
+    JSON list of objects can be found.
+    """
+    start, end = text.find("["), text.rfind("]")
+    if start == -1 or end <= start:
+        raise ValueError("No JSON list of test cases found")
+    test_cases = json.loads(text[start:end + 1])
+    if not isinstance(test_cases, list) or not all(isinstance(case, dict) for case in test_cases):
+        raise ValueError("Expected a JSON list of test case objects")
+    return test_cases
+
+_RETRY_HINT = re.compile(r"retry[ _-]?(?:after|delay|in)\D{0,20}?(\d+(?:\.\d+)?)", re.IGNORECASE)
+
+def _is_rate_limit_error(error: Exception) -> bool:
+    text = f"{type(error).__name__} {error}".lower()
+    return any(marker in text for marker in ("429", "resourceexhausted", "resource exhausted", "rate limit", "quota", "503", "unavailable"))
+
+def _retry_delay(error: Exception, attempt: int) -> float:
+    """Server-suggested delay if the error carries one, else exponential backoff with jitter."""
+    match = _RETRY_HINT.search(str(error))
+    if match:
+        return float(match.group(1))
+    return BATCH_BASE_DELAY_SECONDS * 2 ** (attempt - 1) * random.uniform(0.8, 1.2)
+
+async def agenerate_selenium_scripts(
+    llm,
+    vector_db,
+    test_cases: List[dict],
+    html_content: str,
+    max_concurrency: int = BATCH_MAX_CONCURRENCY,
+    max_retries: int = BATCH_MAX_RETRIES,
+    use_cache: bool = True,
+    on_status: Optional[Callable[[int, str], None]] = None,
+    page_index: Optional[dict] = None,
+) -> List[ScriptResult]:
+    """Generates one Selenium script per test case concurrently through ainvoke.
+
+    At most max_concurrency LLM calls are in flight. Rate-limit errors (429 /
+    quota / unavailable) are retried up to max_retries times with backoff; other
+    errors fail that item only. on_status(index, status) reports per-item progress.
+    Results are returned in input order.
+    """
+    semaphore = asyncio.Semaphore(max_concurrency)
+    rag_chain = (
+        _selenium_prompt_chain(vector_db, html_content, page_index)
+        | cached_llm(llm, enabled=use_cache)
+        | StrOutputParser()
+    )
+
+    def report(index: int, status: str):
+        if on_status:
+            on_status(index, status)
+
+    async def generate_one(index: int, test_case: dict) -> ScriptResult:
+        test_id = str(test_case.get("Test_ID", f"TC_{index + 1:03d}"))
+        start = time.perf_counter()
+        attempt = 0
+        async with semaphore:
+            while True:
+                attempt += 1
+                report(index, "running" if attempt == 1 else f"retrying (attempt {attempt})")
+                try:
+                    result = await rag_chain.ainvoke(json.dumps(test_case, indent=2))
+                    report(index, "done")
+                    return ScriptResult(test_id, _strip_fences(result), None, attempt, time.perf_counter() - start)
+                except Exception as e:
+                    if attempt > max_retries or not _is_rate_limit_error(e):
+                        report(index, "failed")
+                        return ScriptResult(test_id, None, f"{type(e).__name__}: {e}", attempt, time.perf_counter() - start)
+                    delay = _retry_delay(e, attempt)
+                    report(index, f"rate limited, retrying in {delay:.0f}s")
+                    await asyncio.sleep(delay)
+
+    for index in range(len(test_cases)):
+        report(index, "queued")
+    return await asyncio.gather(*(generate_one(i, case) for i, case in enumerate(test_cases)))
+
+def generate_selenium_scripts(llm, vector_db, test_cases: List[dict], html_content: str, **kwargs) -> List[ScriptResult]:
+    """Synchronous entry point for agenerate_selenium_scripts (e.g. from Streamlit)."""
+    return asyncio.run(agenerate_selenium_scripts(llm, vector_db, test_cases, html_content, **kwargs))
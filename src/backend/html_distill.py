@@ -0,0 +1,107 @@
+from functools import lru_cache
+from typing import List
+
+from bs4 import BeautifulSoup
+
+CONTROL_TAGS = ("input", "select", "textarea", "button")
+CONTROL_ATTRIBUTES = ("type", "name", "id", "placeholder", "value", "href", "role", "aria-label", "data-testid")
+MAX_TEXT_LENGTH = 60
+
+def _text(element) -> str:
+    text = " ".join(element.get_text(" ", strip=True).split())
+    return text if len(text) <= MAX_TEXT_LENGTH else text[:MAX_TEXT_LENGTH - 3] + "..."
+
+def _label_for(soup, element) -> str:
+    """Text of the <label for=id> or wrapping <label> of a form control."""
+    if element.get("id"):
+        label = soup.find("label", attrs={"for": element["id"]})
+        if label:
+            return _text(label)
+    label = element.find_parent("label")
+    if label:
+        # Only the label's own text, not the control values inside it
+        return " ".join(
+            " ".join(s.split()) for s in label.find_all(string=True)
+            if s.parent.name not in CONTROL_TAGS and s.strip()
+        )
+    return ""
+
+def _describe(soup, element) -> str:
+    parts = [element.name]
+    for attribute in CONTROL_ATTRIBUTES:
+        value = element.get(attribute)
+        if not value:
+            continue
+        # Prefilled field values are noise; button values are their visible text
+        if attribute == "value" and not (element.name == "button" or element.get("type") in ("submit", "button")):
+            continue
+        parts.append(f'{attribute}="{" ".join(value) if isinstance(value, list) else value}"')
+    if element.name in ("button", "a", "select", "textarea") and _text(element):
+        parts.append(f'text="{_text(element)}"')
+    if element.name in ("input", "select", "textarea"):
+        label = _label_for(soup, element)
+        if label:
+            parts.append(f'label="{label}"')
+    return " ".join(parts)
+
+def distill_html(html: str) -> str:
+    """Reduces a page to a compact locator map of its interactive elements.
+
+    Lists forms with their controls (type, name, id, label, placeholder), buttons
+    with their exact text, links, and other elements that carry an id. Styles,
+    scripts and decorative markup are dropped.
+    """
+    return _distill_cached(html)
+
+@lru_cache(maxsize=64)
+def _distill_cached(html: str) -> str:
+    soup = BeautifulSoup(html, "html.parser")
+    for element in soup(["script", "style", "svg", "noscript", "head", "meta", "link"]):
+        if element.name != "head" or not element.find("title"):
+            element.decompose()
+
+    lines: List[str] = []
+    seen = set()
+
+    def add(line: str, element=None):
+        if line not in seen:
+            seen.add(line)
+            lines.append(line)
+        if element is not None:
+            described.add(id(element))
+
+    described = set()
+    title = soup.find("title")
+    if title and _text(title):
+        add(f"PAGE TITLE: {_text(title)}")
+
+    for form in soup.find_all("form"):
+        attributes = " ".join(f'{a}="{form.get(a)}"' for a in ("id", "action", "method") if form.get(a))
+        add(f"FORM {attributes}".rstrip())
+        for control in form.find_all(CONTROL_TAGS):
+            if control.get("type") == "hidden" and not control.get("name"):
+                continue
+            add(f"  - {_describe(soup, control)}", control)
+        described.add(id(form))
+
+    controls = [c for c in soup.find_all(CONTROL_TAGS + ("a",)) if id(c) not in described]
+    buttons = [c for c in controls if c.name != "a"]
+    if buttons:
+        add("CONTROLS OUTSIDE FORMS:")
+        for control in buttons:
+            add(f"  - {_describe(soup, control)}", control)
+
+    links = [c for c in controls if c.name == "a" and (c.get("href") or _text(c))]
+    if links:
+        add("LINKS:")
+        for link in links:
+            add(f"  - {_describe(soup, link)}", link)
+
+    others = [e for e in soup.find_all(attrs={"id": True}) if id(e) not in described]
+    if others:
+        add("OTHER ELEMENTS WITH IDS:")
+        for element in others:
+            text = _text(element)
+            add(f'  - {element.name}#{element["id"]}' + (f' text="{text}"' if text else ""), element)
+
+    return "\n".join(lines)
@@ -1,61 +1,664 @@
 import os
-from typing import List
+import copy
+import json
+import platform
+import logging
+import uuid
+import hashlib
+import threading
+from collections import defaultdict, deque
+from itertools import groupby, islice
+from functools import lru_cache
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeoutError
+from concurrent.futures.process import BrokenProcessPool
+from typing import Callable, Iterable, Iterator, List, NamedTuple, Optional
+import faiss
 from langchain_community.document_loaders import (
     TextLoader,
     UnstructuredMarkdownLoader,
     BSHTMLLoader
 )
-from langchain_text_splitters import RecursiveCharacterTextSplitter
 from langchain_huggingface import HuggingFaceEmbeddings
 from langchain_community.vectorstores import FAISS
 from langchain_core.documents import Document
 
-def load_documents(file_paths: List[str]) -> List[Document]:
+from backend.embedding_cache import EmbeddingCache, CachedEmbeddings, DEFAULT_CACHE_PATH
+from backend.bm25 import BM25_FILE, BM25Index, build_keyword_index, update_keyword_index
+from backend.pdf_loader import PagedPDFLoader, pdf_page_ranges
+from backend.chunking import CHUNK_OVERLAP, CHUNK_SIZE, default_chunking_strategy, get_splitter
+from backend.chunk_store import CHUNK_STORE_FILE, PositionMap, SQLiteDocstore, StagedDocstore, open_staged, write_chunk_store
+from backend.faiss_index import (
+    IndexSpec,
+    TunedIndex,
+    default_index_spec,
+    index_type_of,
+    needs_retrain,
+    rebuild_index,
+    search_parameters,
+    set_search_params,
+)
+
+EMBEDDING_MODEL = "all-MiniLM-L6-v2"
+# "torch" (sentence-transformers default), "onnx" (ONNX Runtime) or "onnx-int8" (dynamically quantized ONNX)
+EMBEDDING_BACKENDS = ("torch", "onnx", "onnx-int8")
+# Quantized variants shipped with the sentence-transformers models, by CPU feature
+ONNX_INT8_FILES = {
+    "avx512_vnni": "onnx/model_qint8_avx512_vnni.onnx",
+    "avx512": "onnx/model_qint8_avx512.onnx",
+    "arm64": "onnx/model_qint8_arm64.onnx",
+}
+# Portable fallback: runs on any x86-64 CPU with AVX2
+ONNX_INT8_FILE = "onnx/model_quint8_avx2.onnx"
+MANIFEST_FILE = "manifest.json"
+INDEX_FILE = "index.faiss"
+LEGACY_PICKLE_FILE = "index.pkl"
+LOAD_TIMEOUT_SECONDS = 300
+EMBED_BATCH_SIZE = 64
+
+logger = logging.getLogger(__name__)
+
+# Loaded vector stores keyed by (absolute db_path, mmap) -> (on-disk signature, store)
+_vector_db_cache = {}
+_vector_db_lock = threading.Lock()
+
+@lru_cache(maxsize=None)
+def get_embedding_cache(path: str = DEFAULT_CACHE_PATH):
+    """Returns the process-wide on-disk embedding cache."""
+    return EmbeddingCache(path)
+
+class EmbeddingConfig(NamedTuple):
+    """Settings of the embedding engine; also part of the embedding cache and manifest keys."""
+    model_name: str = EMBEDDING_MODEL
+    backend: str = "torch"
+    batch_size: int = 64
+    num_threads: Optional[int] = None
+    normalize: bool = False
+    onnx_file: Optional[str] = None  # onnx-int8 only; picked from the CPU's features when None
+
+    @property
+    def cache_key(self) -> str:
+        # Batch size and thread count don't change the vectors, the rest does
+        backend = self.backend
+        if backend == "onnx-int8":
+            # Each quantized variant gives slightly different vectors
+            backend = f"{backend}:{os.path.basename(self.onnx_file or default_onnx_int8_file())}"
+        return f"{self.model_name}|{backend}|{'norm' if self.normalize else 'raw'}"
+
+@lru_cache(maxsize=None)
+def default_onnx_int8_file() -> str:
+    """Picks the quantized ONNX model for this CPU, falling back to the portable AVX2 one."""
+    if platform.machine().lower() in ("arm64", "aarch64"):
+        return ONNX_INT8_FILES["arm64"]
+    try:
+        with open("/proc/cpuinfo", encoding="utf-8") as f:
+            flags = next((line.split(":", 1)[1].split() for line in f if line.startswith("flags")), [])
+    except OSError:
+        return ONNX_INT8_FILE
+    if "avx512_vnni" in flags:
+        return ONNX_INT8_FILES["avx512_vnni"]
+    if "avx512bw" in flags:
+        return ONNX_INT8_FILES["avx512"]
+    return ONNX_INT8_FILE
+
+def default_embedding_config() -> EmbeddingConfig:
+    """Builds the embedding settings from EMBEDDING_* environment variables."""
+    num_threads = os.getenv("EMBEDDING_THREADS")
+    return EmbeddingConfig(
+        model_name=os.getenv("EMBEDDING_MODEL", EMBEDDING_MODEL),
+        backend=os.getenv("EMBEDDING_BACKEND", "torch"),
+        batch_size=int(os.getenv("EMBEDDING_BATCH_SIZE", "64")),
+        num_threads=int(num_threads) if num_threads else None,
+        normalize=os.getenv("EMBEDDING_NORMALIZE", "").lower() in ("1", "true", "yes"),
+        onnx_file=os.getenv("EMBEDDING_ONNX_FILE") or None,
+    )
+
+def build_embedding_model(config: EmbeddingConfig):
+    """Creates the HuggingFace embedding model for the given engine settings."""
+    if config.backend not in EMBEDDING_BACKENDS:
+        raise ValueError(f"Unknown embedding backend {config.backend!r}, expected one of {EMBEDDING_BACKENDS}")
+
+    model_kwargs = {"device": "cpu"}
+    if config.backend == "torch":
+        if config.num_threads:
+            # Process-wide setting: intra-op threads used by the torch forward pass
+            import torch
+            torch.set_num_threads(config.num_threads)
+    else:
+        model_kwargs["backend"] = "onnx"
+        onnx_kwargs = {}
+        if config.backend == "onnx-int8":
+            onnx_kwargs["file_name"] = config.onnx_file or default_onnx_int8_file()
+        if config.num_threads:
+            # ONNX Runtime ignores torch's setting; threads are per inference session
+            import onnxruntime
+            session_options = onnxruntime.SessionOptions()
+            session_options.intra_op_num_threads = config.num_threads
+            onnx_kwargs["session_options"] = session_options
+        if onnx_kwargs:
+            model_kwargs["model_kwargs"] = onnx_kwargs
+
+    # Using HuggingFace embeddings (local, no API quota limits)
+    return HuggingFaceEmbeddings(
+        model_name=config.model_name,
+        model_kwargs=model_kwargs,
+        encode_kwargs={"batch_size": config.batch_size, "normalize_embeddings": config.normalize},
+    )
+
+def get_embeddings(config: Optional[EmbeddingConfig] = None, use_cache: bool = True):
+    """Returns the process-wide embedding model, loaded once per engine configuration.
+
+    By default the model sits behind the on-disk embedding cache, so texts that were
+    embedded before (by any build or query) skip the forward pass.
+    """
+    return _get_embeddings(config or default_embedding_config(), use_cache)
+
+@lru_cache(maxsize=None)
+def _get_embeddings(config: EmbeddingConfig, use_cache: bool):
+    embeddings = build_embedding_model(config)
+    if use_cache:
+        return CachedEmbeddings(embeddings, config.cache_key, get_embedding_cache())
+    return embeddings
+
+def _index_signature(db_path: str):
+    """Returns a (name, mtime, size) fingerprint of the files in db_path, or None if it is missing."""
+    if not os.path.isdir(db_path):
+        return None
+    signature = []
+    for name in sorted(os.listdir(db_path)):
+        path = os.path.join(db_path, name)
+        if os.path.isfile(path):
+            stat = os.stat(path)
+            signature.append((name, stat.st_mtime_ns, stat.st_size))
+    return tuple(signature) or None
+
+class LoadResult(NamedTuple):
+    """Outcome of loading a single file (or page range): its documents, or the error that stopped it.
+
+    partial is set on every page range of a large PDF but the last.
+    """
+    path: str
+    documents: List[Document]
+    error: Optional[str] = None
+    skipped: bool = False
+    partial: bool = False
+
+def _get_loader(file_path: str, chunking: str, pages: Optional[tuple] = None):
+    """Returns the LangChain loader for a file, or None if the type is not supported.
+
+    With structured chunking, markdown and HTML are loaded as-is so the splitter
+    can see their headers and forms. pages limits a PDF to a [start, stop) range.
+    """
+    ext = os.path.splitext(file_path)[1].lower()
+    structured = chunking == "structured"
+    if ext == ".txt":
+        return TextLoader(file_path, encoding="utf-8")
+    elif ext == ".md":
+        return TextLoader(file_path, encoding="utf-8") if structured else UnstructuredMarkdownLoader(file_path)
+    elif ext == ".json":
+        return TextLoader(file_path, encoding="utf-8")
+    elif ext == ".html":
+        return TextLoader(file_path, encoding="utf-8") if structured else BSHTMLLoader(file_path, bs_kwargs={'features': 'html.parser'})
+    elif ext == ".pdf":
+        return PagedPDFLoader(file_path, pages)
+    return None
+
+def _load_file(file_path: str, chunking: str, pages: Optional[tuple] = None) -> LoadResult:
+    """Loads one file (or one page range of a PDF). Runs in worker processes, so it must never raise."""
+    try:
+        loader = _get_loader(file_path, chunking, pages)
+        if loader is None:
+            return LoadResult(file_path, [], skipped=True)
+
+        docs = []
+        for doc in loader.lazy_load():
+            # Add metadata
+            doc.metadata["source"] = os.path.basename(file_path)
+            docs.append(doc)
+        return LoadResult(file_path, docs)
+    except Exception as e:
+        return LoadResult(file_path, [], error=f"{type(e).__name__}: {e}")
+
+def _load_tasks(file_paths: List[str]) -> List[tuple]:
+    """Splits the paths into (file_path, pages, last) tasks: one per file, one per page range of a large PDF."""
+    tasks = []
+    for file_path in file_paths:
+        ranges = pdf_page_ranges(file_path) if file_path.lower().endswith(".pdf") else [None]
+        tasks.extend((file_path, pages, number == len(ranges) - 1) for number, pages in enumerate(ranges))
+    return tasks
+
+def _merge_parts(parts: List[LoadResult]) -> LoadResult:
+    """Joins the results of a file's page ranges into one; any failed range fails the whole file."""
+    if len(parts) == 1:
+        return parts[0]
+    for part in parts:
+        if part.error:
+            return LoadResult(part.path, [], error=part.error)
+    return LoadResult(parts[0].path, [doc for part in parts for doc in part.documents])
+
+def iter_load_files(
+    file_paths: List[str],
+    max_workers: int = 1,
+    timeout: float = LOAD_TIMEOUT_SECONDS,
+    chunking: Optional[str] = None,
+) -> Iterator[LoadResult]:
+    """Yields LoadResults in input order as files finish loading.
+
+    PDFs longer than PDF_PAGES_PER_TASK pages are loaded as separate page-range
+    tasks, and each range is yielded as soon as it is parsed (with partial=True on
+    all but the last), so no more than one range of a large spec is held at a
+    time. If a range fails, its result carries the error; the ranges before it
+    have already been yielded. Every other file yields exactly one result.
+
+    With max_workers > 1 the tasks are spread over a process pool, so one large
+    spec is parsed in parallel too. At most 2 * max_workers tasks are in flight,
+    so parsed documents never pile up faster than the consumer takes them. A task
+    that takes longer than `timeout` seconds is reported as an error instead of
+    holding up the rest of the batch; its worker is killed and the other in-flight
+    tasks are rerun on a fresh pool.
+
+    chunking must match the strategy later passed to create_vector_db(), since
+    it decides how markdown and HTML are loaded (CHUNKING_STRATEGY by default).
+    """
+    chunking = chunking or default_chunking_strategy()
+    tasks = _load_tasks(file_paths)
+    if max_workers <= 1 or len(tasks) <= 1:
+        for file_path, pages, last in tasks:
+            yield _load_file(file_path, chunking, pages)._replace(partial=not last)
+        return
+
+    workers = min(max_workers, len(tasks))
+    executor = ProcessPoolExecutor(max_workers=workers)
+
+    def submit(task):
+        file_path, pages, _ = task
+        return task, executor.submit(_load_file, file_path, chunking, pages)
+
+    try:
+        remaining = iter(tasks)
+        pending = deque(submit(task) for task in islice(remaining, 2 * max_workers))
+        while pending:
+            (file_path, _, last), future = pending.popleft()
+            try:
+                result = future.result(timeout=timeout)
+            except (FutureTimeoutError, BrokenProcessPool) as e:
+                # A hung worker would keep parsing (and block interpreter exit); a dead one
+                # breaks the pool. Kill the pool and rerun the other in-flight tasks on a new one.
+                error = f"Timed out after {timeout}s" if isinstance(e, FutureTimeoutError) else f"{type(e).__name__}: {e}"
+                result = LoadResult(file_path, [], error=error)
+                _kill_pool(executor)
+                executor = ProcessPoolExecutor(max_workers=workers)
+                pending = deque(submit(task) for task, _ in pending)
+            except Exception as e:
+                result = LoadResult(file_path, [], error=f"{type(e).__name__}: {e}")
+
+            next_task = next(remaining, None)
+            if next_task is not None:
+                pending.append(submit(next_task))
+            yield result._replace(partial=not last)
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+def _kill_pool(executor: ProcessPoolExecutor):
+    """Shuts a process pool down without waiting for its running tasks."""
+    # ProcessPoolExecutor has no public way to stop a busy worker before Python 3.14
+    processes = list((executor._processes or {}).values())
+    executor.shutdown(wait=False, cancel_futures=True)
+    for process in processes:
+        process.kill()
+
+def load_files(
+    file_paths: List[str],
+    max_workers: int = 1,
+    timeout: float = LOAD_TIMEOUT_SECONDS,
+    chunking: Optional[str] = None,
+) -> List[LoadResult]:
+    """Loads each file and returns one LoadResult per path, in input order."""
+    results, parts = [], []
+    for result in iter_load_files(file_paths, max_workers=max_workers, timeout=timeout, chunking=chunking):
+        parts.append(result)
+        if not result.partial:
+            results.append(_merge_parts(parts))
+            parts = []
+    return results
+
+def load_documents(file_paths: List[str], max_workers: int = 1, chunking: Optional[str] = None) -> List[Document]:
     """Loads documents from the given file paths."""
     documents = []
-    for file_path in file_paths:
-        ext = os.path.splitext(file_path)[1].lower()
-        try:
-            if ext == ".txt":
-                loader = TextLoader(file_path, encoding="utf-8")
-            elif ext == ".md":
-                loader = UnstructuredMarkdownLoader(file_path)
-            elif ext == ".json":
-                loader = TextLoader(file_path, encoding="utf-8")
-            elif ext == ".html":
-                loader = BSHTMLLoader(file_path, bs_kwargs={'features': 'html.parser'})
-            else:
-                continue
-            
-            docs = loader.load()
-            
-            # Add metadata
-            for doc in docs:
-                doc.metadata["source"] = os.path.basename(file_path)
-            documents.extend(docs)
-        except Exception as e:
-            print(f"Error loading {file_path}: {e}")
+    for result in load_files(file_paths, max_workers=max_workers, chunking=chunking):
+        if result.error:
+            logger.warning("Error loading %s: %s", result.path, result.error)
+        documents.extend(result.documents)
     return documents
 
-def create_vector_db(documents: List[Document], api_key: str = None, db_path: str = "faiss_db"):
-    """Creates and saves a FAISS vector database."""
-    if not documents:
+def _hash_text(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+def _read_manifest(db_path: str):
+    """Reads the per-file / per-chunk hash manifest stored next to the index."""
+    path = os.path.join(db_path, MANIFEST_FILE)
+    if not os.path.exists(path):
         return None
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
 
-    text_splitter = RecursiveCharacterTextSplitter(chunk_size=1000, chunk_overlap=200)
-    texts = text_splitter.split_documents(documents)
+def _write_manifest(db_path: str, manifest: dict):
+    path = os.path.join(db_path, MANIFEST_FILE)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f)
+    os.replace(tmp_path, path)
 
-    # Using HuggingFace embeddings (local, no API quota limits)
-    embeddings = HuggingFaceEmbeddings(model_name="all-MiniLM-L6-v2")
-    
-    vector_db = FAISS.from_documents(texts, embeddings)
-    vector_db.save_local(db_path)
+def _new_manifest(index_spec: IndexSpec, chunking: str) -> dict:
+    return {
+        "embedding_model": default_embedding_config().cache_key,
+        "chunking": chunking,
+        "chunk_size": CHUNK_SIZE,
+        "chunk_overlap": CHUNK_OVERLAP,
+        "index_build": index_spec.build_key,
+        "index": index_spec._asdict(),
+        "index_trained_on": 0,
+        "files": {},
+    }
+
+def _manifest_matches_settings(manifest: dict, index_spec: IndexSpec, chunking: str) -> bool:
+    """Existing vectors are only reusable when the splitter, model and index type are unchanged."""
+    reference = _new_manifest(index_spec, chunking)
+    return all(
+        manifest.get(key) == reference[key]
+        for key in ("embedding_model", "chunking", "chunk_size", "chunk_overlap", "index_build")
+    )
+
+def _group_by_source(documents: List[Document]) -> dict:
+    grouped = defaultdict(list)
+    for doc in documents:
+        grouped[doc.metadata.get("source", "unknown")].append(doc)
+    return grouped
+
+def _iter_source_groups(documents: Iterable[Document]) -> Iterator[tuple]:
+    """Yields (source, docs) pairs.
+
+    Lists are grouped as a whole; other iterables are consumed lazily and must
+    yield the documents of each source consecutively (as iter_load_files does).
+    """
+    if isinstance(documents, list):
+        yield from _group_by_source(documents).items()
+        return
+    for source, docs in groupby(documents, key=lambda doc: doc.metadata.get("source", "unknown")):
+        yield source, list(docs)
+
+def _iter_new_chunks(groups, manifest: dict, text_splitter, new_files: dict, to_delete: list):
+    """Splits each changed source and yields (chunk, chunk_id) for chunks that need embedding.
+
+    Fills new_files with the manifest entry of every source seen and to_delete with
+    the ids of vectors whose chunks are gone.
+    """
+    for source, docs in groups:
+        file_hash = _hash_text("\0".join(doc.page_content for doc in docs))
+        previous = manifest["files"].get(source)
+        if previous and previous["hash"] == file_hash:
+            new_files[source] = previous
+            continue
+
+        # Reuse vectors of chunks whose text is unchanged; everything else is re-embedded
+        reusable = defaultdict(list)
+        for chunk_hash, chunk_id in (previous or {}).get("chunks", []):
+            reusable[chunk_hash].append(chunk_id)
+
+        chunks = []
+        for chunk in text_splitter.split_documents(docs):
+            chunk_hash = _hash_text(chunk.page_content)
+            if reusable[chunk_hash]:
+                chunk_id = reusable[chunk_hash].pop()
+            else:
+                chunk_id = str(uuid.uuid4())
+                yield chunk, chunk_id
+            chunks.append([chunk_hash, chunk_id])
+
+        to_delete.extend(chunk_id for ids in reusable.values() for chunk_id in ids)
+        new_files[source] = {"hash": file_hash, "chunks": chunks}
+
+def _batched(iterable, size: int):
+    iterator = iter(iterable)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
+def _remember_vector_db(key, signature, vector_db):
+    # Consumers (e.g. the retrieval cache) use index_version to notice rebuilds
+    vector_db.index_version = _hash_text(repr(signature))
+    _vector_db_cache[key] = (signature, vector_db)
+
+def _cache_vector_db(db_path: str, vector_db):
+    # Hand the fresh store to later load_vector_db() calls instead of re-reading it
+    with _vector_db_lock:
+        _remember_vector_db((os.path.abspath(db_path), False), _index_signature(db_path), vector_db)
+
+def create_vector_db(
+    documents: Iterable[Document],
+    api_key: str = None,
+    db_path: str = "faiss_db",
+    incremental: bool = False,
+    batch_size: int = EMBED_BATCH_SIZE,
+    progress_callback: Optional[Callable[[int], None]] = None,
+    index_spec: Optional[IndexSpec] = None,
+    chunking: Optional[str] = None,
+):
+    """Creates and saves a FAISS vector database.
+
+    Documents may be a list or a lazy iterable (e.g. fed from iter_load_files). Chunks
+    stream through splitting, embedding and indexing in batches of `batch_size`, so
+    memory stays bounded by the batch rather than the corpus; progress_callback is
+    called with the running number of embedded chunks after each batch.
+
+    With incremental=True, the manifest saved next to the index is used to embed only
+    new or changed chunks and to delete the vectors of removed or modified sources.
+    Existing chunks are read from docstore.sqlite on demand rather than loaded, and
+    only the added and deleted rows of docstore.sqlite and bm25.sqlite are written.
+
+    index_spec selects the FAISS index type (flat, ivf_flat, hnsw, ivf_pq); trained
+    types are built from the streamed vectors once all of them are in. The resolved
+    parameters are stored in the manifest and re-applied by load_vector_db(). An
+    incremental build re-resolves them from index_spec when the corpus has outgrown
+    them (see faiss_index.needs_retrain), e.g. a flat fallback that is now big
+    enough for IVF-PQ.
+
+    chunking selects the splitter (see backend.chunking; CHUNKING_STRATEGY by
+    default); load the documents with the same strategy. Changing it, like
+    changing the model or index type, re-embeds everything.
+
+    A BM25 keyword index over all chunks is saved next to the vectors (bm25.sqlite)
+    for hybrid retrieval.
+    """
+    if isinstance(documents, list) and not documents:
+        return None
+    index_spec = index_spec or default_index_spec()
+    chunking = chunking or default_chunking_strategy()
+
+    text_splitter = get_splitter(chunking)
+    embeddings = get_embeddings()
+
+    manifest = _read_manifest(db_path) if incremental else None
+    vector_db = _load_writable(db_path) if manifest else None
+    if vector_db is None or not _manifest_matches_settings(manifest, index_spec, chunking):
+        manifest, vector_db = _new_manifest(index_spec, chunking), None
+    fresh = vector_db is None
+
+    new_files, to_delete = {}, []
+    new_chunks = _iter_new_chunks(_iter_source_groups(documents), manifest, text_splitter, new_files, to_delete)
+    embedded = 0
+    for batch in _batched(new_chunks, batch_size):
+        texts = [chunk.page_content for chunk, _ in batch]
+        metadatas = [chunk.metadata for chunk, _ in batch]
+        ids = [chunk_id for _, chunk_id in batch]
+        text_embeddings = list(zip(texts, embeddings.embed_documents(texts)))
+        if vector_db is None:
+            vector_db = FAISS.from_embeddings(text_embeddings, embeddings, metadatas=metadatas, ids=ids)
+        else:
+            vector_db.add_embeddings(text_embeddings, metadatas=metadatas, ids=ids)
+        embedded += len(batch)
+        if progress_callback:
+            progress_callback(embedded)
+
+    if not new_files:
+        # Nothing was ingested; leave the existing index untouched
+        return None
+
+    # Sources that are no longer part of the knowledge base
+    for source, previous in manifest["files"].items():
+        if source not in new_files:
+            to_delete.extend(chunk_id for _, chunk_id in previous["chunks"])
+
+    if vector_db is None:
+        return None
+    if not embedded and not to_delete:
+        return vector_db
+
+    # Streaming always fills a flat index; trained types are built from it at the end.
+    # manifest["index"] is what was actually built, index_spec what was asked for.
+    resolved_spec = IndexSpec.from_dict(manifest["index"])
+    trained_on = manifest.get("index_trained_on", 0)
+    remaining = vector_db.index.ntotal - len(set(to_delete))
+    if fresh and index_spec.type != "flat":
+        resolved_spec = rebuild_index(vector_db, index_spec, embeddings)
+        trained_on = vector_db.index.ntotal
+    elif needs_retrain(index_spec, resolved_spec, trained_on, remaining, vector_db.index.d):
+        # The corpus outgrew the index built for it: re-derive the type and nlist
+        resolved_spec = rebuild_index(vector_db, index_spec, embeddings, drop_ids=to_delete)
+        trained_on = vector_db.index.ntotal
+    elif to_delete and index_type_of(vector_db.index) != "flat":
+        # IVF/HNSW can't drop vectors in place without breaking the position -> id mapping
+        resolved_spec = rebuild_index(vector_db, resolved_spec, embeddings, drop_ids=to_delete)
+    elif to_delete:
+        vector_db.delete(to_delete)
+
+    manifest["index"] = resolved_spec._asdict()
+    manifest["index_trained_on"] = trained_on
+    manifest["files"] = new_files
+    _save_vector_db(vector_db, db_path)
+    _write_manifest(db_path, manifest)
+    _cache_vector_db(db_path, vector_db)
     return vector_db
 
-def load_vector_db(api_key: str = None, db_path: str = "faiss_db"):
-    """Loads an existing FAISS vector database."""
-    # Using HuggingFace embeddings (local, no API quota limits)
-    embeddings = HuggingFaceEmbeddings(model_name="all-MiniLM-L6-v2")
-    if os.path.exists(db_path):
-        return FAISS.load_local(db_path, embeddings, allow_dangerous_deserialization=True)
-    return None
+def load_vector_db(
+    api_key: str = None,
+    db_path: str = "faiss_db",
+    nprobe: Optional[int] = None,
+    ef_search: Optional[int] = None,
+    mmap: bool = False,
+):
+    """Loads an existing FAISS vector database.
+
+    The store is cached per process and only re-read when the files in db_path change.
+    nprobe (IVF) and ef_search (HNSW) override the search parameters saved with the
+    index for searches through the returned store only; the cached store is shared
+    by every caller in the process and keeps the saved values.
+
+    Chunk text, metadata and the position -> id mapping stay in docstore.sqlite and
+    are read per search hit, so neither load time nor memory grow with the corpus.
+    With mmap=True the index file is also memory-mapped read-only, so start-up is
+    near constant and worker processes on one host share the same page cache.
+    Loaded stores are for querying only; create_vector_db() keeps its own copy.
+    """
+    vector_db = _load_cached_vector_db(db_path, mmap)
+    if vector_db is not None and (nprobe is not None or ef_search is not None):
+        spec = _saved_index_spec(db_path)
+        spec = spec._replace(
+            nprobe=spec.nprobe if nprobe is None else nprobe,
+            ef_search=spec.ef_search if ef_search is None else ef_search,
+        )
+        params = search_parameters(vector_db.index, spec)
+        if params is not None:
+            # Shallow copy: docstore and keyword index stay shared. Results depend on the
+            # search params, so the retrieval cache must key them separately.
+            vector_db = copy.copy(vector_db)
+            vector_db.index = TunedIndex(vector_db.index, params)
+            vector_db.index_version = f"{vector_db.index_version}|nprobe={spec.nprobe}|ef={spec.ef_search}"
+    return vector_db
+
+def _saved_index_spec(db_path: str) -> IndexSpec:
+    manifest = _read_manifest(db_path)
+    if manifest and "index" in manifest:
+        return IndexSpec.from_dict(manifest["index"])
+    return IndexSpec()
+
+def _save_vector_db(vector_db, db_path: str):
+    """Writes index.faiss, docstore.sqlite and bm25.sqlite; no pickle is involved.
+
+    A store opened by _load_writable() only has its added and deleted chunks written
+    to the SQLite files (plus the position -> id mapping); others are written in full.
+    """
+    os.makedirs(db_path, exist_ok=True)
+    index_path = os.path.join(db_path, INDEX_FILE)
+    faiss.write_index(vector_db.index, index_path + ".tmp")
+    os.replace(index_path + ".tmp", index_path)
+    if isinstance(vector_db.docstore, StagedDocstore):
+        staged = vector_db.docstore
+        if os.path.exists(os.path.join(db_path, BM25_FILE)):
+            vector_db.keyword_index = update_keyword_index(staged, db_path)
+            staged.commit(vector_db.index_to_docstore_id)
+        else:
+            staged.commit(vector_db.index_to_docstore_id)
+            vector_db.keyword_index = build_keyword_index(vector_db, db_path)
+    else:
+        write_chunk_store(vector_db, db_path)
+        vector_db.keyword_index = build_keyword_index(vector_db, db_path)
+
+    legacy_path = os.path.join(db_path, LEGACY_PICKLE_FILE)
+    if os.path.exists(legacy_path):
+        os.remove(legacy_path)
+
+def _migrate_legacy_pickle(db_path: str):
+    """Converts a knowledge base saved by FAISS.save_local (index.pkl) to docstore.sqlite.
+
+    This is the only place the pickle is still read, and only for a db_path that
+    predates the SQLite chunk store.
+    """
+    logger.warning("Migrating %s from index.pkl to %s", db_path, CHUNK_STORE_FILE)
+    vector_db = FAISS.load_local(db_path, get_embeddings(), allow_dangerous_deserialization=True)
+    _save_vector_db(vector_db, db_path)
+
+def _load_writable(db_path: str):
+    """Opens the store for ingestion to modify and save; chunk changes are staged in memory."""
+    if not os.path.exists(os.path.join(db_path, CHUNK_STORE_FILE)):
+        if not os.path.exists(os.path.join(db_path, LEGACY_PICKLE_FILE)):
+            return None
+        _migrate_legacy_pickle(db_path)
+    index = faiss.read_index(os.path.join(db_path, INDEX_FILE))
+    docstore, index_to_docstore_id = open_staged(db_path)
+    return FAISS(get_embeddings(), index, docstore, index_to_docstore_id)
+
+def _load_lazy(db_path: str, mmap: bool):
+    """Opens the index and attaches the SQLite docstore; chunks are fetched per hit."""
+    if not os.path.exists(os.path.join(db_path, CHUNK_STORE_FILE)):
+        _migrate_legacy_pickle(db_path)
+
+    index_path = os.path.join(db_path, INDEX_FILE)
+    if mmap:
+        flags = faiss.IO_FLAG_MMAP | faiss.IO_FLAG_READ_ONLY
+        if not _saved_index_spec(db_path).type.startswith("ivf"):
+            # Newer FAISS releases can also map the codes of flat and HNSW indexes; combined
+            # with IO_FLAG_MMAP the same flag makes reading IVF inverted lists fail
+            flags |= getattr(faiss, "IO_FLAG_MMAP_IFC", 0)
+        index = faiss.read_index(index_path, flags)
+    else:
+        index = faiss.read_index(index_path)
+    docstore = SQLiteDocstore(os.path.join(db_path, CHUNK_STORE_FILE), read_only=True)
+    return FAISS(get_embeddings(), index, docstore, PositionMap(docstore))
+
+def _load_cached_vector_db(db_path: str, mmap: bool = False):
+    key = (os.path.abspath(db_path), mmap)
+    with _vector_db_lock:
+        signature = _index_signature(db_path)
+        if signature is None or not os.path.exists(os.path.join(db_path, INDEX_FILE)):
+            _vector_db_cache.pop(key, None)
+            return None
+
+        cached = _vector_db_cache.get(key)
+        if cached and cached[0] == signature:
+            return cached[1]
+
+        vector_db = _load_lazy(db_path, mmap)
+        set_search_params(vector_db.index, _saved_index_spec(db_path))
+        vector_db.keyword_index = BM25Index.load(db_path)
+        # Re-read the signature: a legacy migration rewrites the files
+        _remember_vector_db(key, _index_signature(db_path), vector_db)
+        return vector_db
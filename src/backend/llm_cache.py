@@ -0,0 +1,152 @@
+import os
+import time
+import sqlite3
+import hashlib
+import threading
+from functools import lru_cache
+from typing import Optional
+
+from langchain_core.messages import AIMessage
+from langchain_core.runnables import RunnableLambda
+
+DEFAULT_CACHE_PATH = os.path.join(".cache", "llm_responses.sqlite")
+DEFAULT_TTL_SECONDS = 7 * 24 * 3600
+DEFAULT_MAX_ENTRIES = 5_000
+
+class LLMResponseCache:
+    """SQLite cache of LLM completions keyed by (model, temperature, rendered prompt hash).
+
+    Entries expire after ttl_seconds; above max_entries the least recently used
+    rows are evicted.
+    """
+
+    def __init__(self, path: str = DEFAULT_CACHE_PATH, ttl_seconds: float = DEFAULT_TTL_SECONDS, max_entries: int = DEFAULT_MAX_ENTRIES):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS responses (
+                key TEXT PRIMARY KEY,
+                response TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                last_used REAL NOT NULL
+            )"""
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_responses_last_used ON responses (last_used)")
+        self._conn.commit()
+
+    @staticmethod
+    def make_key(model: str, temperature, prompt: str) -> str:
+        prompt_hash = hashlib.sha256(prompt.encode("utf-8")).hexdigest()
+        return f"{model}|{temperature}|{prompt_hash}"
+
+    def get(self, key: str) -> Optional[str]:
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT response, created_at FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None or now - row[1] > self.ttl_seconds:
+                if row is not None:
+                    self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                    self._conn.commit()
+                self.misses += 1
+                return None
+            self._conn.execute("UPDATE responses SET last_used = ? WHERE key = ?", (now, key))
+            self._conn.commit()
+            self.hits += 1
+            return row[0]
+
+    def put(self, key: str, response: str):
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses (key, response, created_at, last_used) VALUES (?, ?, ?, ?)",
+                (key, response, now, now),
+            )
+            self._conn.execute("DELETE FROM responses WHERE created_at < ?", (now - self.ttl_seconds,))
+            (count,) = self._conn.execute("SELECT COUNT(*) FROM responses").fetchone()
+            if count > self.max_entries:
+                self._conn.execute(
+                    "DELETE FROM responses WHERE key IN "
+                    "(SELECT key FROM responses ORDER BY last_used ASC LIMIT ?)",
+                    (count - self.max_entries,),
+                )
+            self._conn.commit()
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM responses")
+            self._conn.commit()
+
+@lru_cache(maxsize=None)
+def get_llm_cache(path: str = DEFAULT_CACHE_PATH) -> LLMResponseCache:
+    """Returns the process-wide LLM response cache."""
+    return LLMResponseCache(path)
+
+def llm_cache_key(llm, prompt_value) -> str:
+    """Cache key for running `llm` on a rendered prompt (PromptValue or string)."""
+    model = getattr(llm, "model", None) or getattr(llm, "model_name", None) or type(llm).__name__
+    prompt = prompt_value if isinstance(prompt_value, str) else prompt_value.to_string()
+    return LLMResponseCache.make_key(model, getattr(llm, "temperature", None), prompt)
+
+def cached_llm(llm, cache: Optional[LLMResponseCache] = None, enabled: bool = True):
+    """Wraps a chat model so identical rendered prompts are answered from the cache.
+
+    Drop-in for `llm` inside a chain (supports invoke and ainvoke). Any chat model
+    works, e.g. FakeListChatModel to exercise the chains offline.
+    """
+    if not enabled:
+        return llm
+    cache = cache or get_llm_cache()
+
+    def invoke(prompt_value):
+        key = llm_cache_key(llm, prompt_value)
+        response = cache.get(key)
+        if response is None:
+            response = llm.invoke(prompt_value).content
+            cache.put(key, response)
+        return AIMessage(content=response)
+
+    async def ainvoke(prompt_value):
+        key = llm_cache_key(llm, prompt_value)
+        response = cache.get(key)
+        if response is None:
+            response = (await llm.ainvoke(prompt_value)).content
+            cache.put(key, response)
+        return AIMessage(content=response)
+
+    return RunnableLambda(invoke, afunc=ainvoke, name="cached_llm")
+
+def stream_llm(llm, prompt_value, cache: Optional[LLMResponseCache] = None, enabled: bool = True):
+    """Yields the completion of `llm` for a rendered prompt as text tokens.
+
+    A cache hit is yielded as a single token; a streamed miss is stored once the
+    stream has finished, so an interrupted stream never caches a partial answer.
+    """
+    if not enabled:
+        for chunk in llm.stream(prompt_value):
+            yield chunk.content
+        return
+
+    cache = cache or get_llm_cache()
+    key = llm_cache_key(llm, prompt_value)
+    response = cache.get(key)
+    if response is not None:
+        yield response
+        return
+
+    parts = []
+    for chunk in llm.stream(prompt_value):
+        parts.append(chunk.content)
+        yield chunk.content
+    cache.put(key, "".join(parts))
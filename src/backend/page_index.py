@@ -0,0 +1,126 @@
+import os
+import re
+import json
+import math
+import glob
+from collections import Counter
+from typing import Dict, List, Optional
+
+from backend.bm25 import fold_plural
+from backend.html_distill import distill_html
+
+PAGE_INDEX_FILE = "page_index.json"
+MAX_PAGES = 3
+
+_ROUTE = re.compile(
+    r"@app\.route\(\s*['\"]([^'\"]+)['\"](?:\s*,\s*methods\s*=\s*\[([^\]]*)\])?\s*\)\s*"
+    r"(?:@[\w.]+(?:\([^)]*\))?\s*)*def\s+(\w+)\s*\("
+)
+_RENDER = re.compile(r"render_template\(\s*['\"]([^'\"]+\.html)['\"]")
+_URL_FOR = re.compile(r"\{\{\s*url_for\(\s*['\"](\w+)['\"][^}]*\)\s*\}\}")
+_WORD = re.compile(r"[a-z][a-z0-9]{2,}")
+
+def parse_flask_routes(routes_path: str) -> Dict[str, dict]:
+    """Maps endpoint name -> {"route", "methods", "template"} from a Flask routes module."""
+    with open(routes_path, encoding="utf-8") as f:
+        source = f.read()
+    matches = list(_ROUTE.finditer(source))
+    endpoints = {}
+    for i, match in enumerate(matches):
+        body = source[match.end():matches[i + 1].start() if i + 1 < len(matches) else len(source)]
+        template = _RENDER.search(body)
+        methods = [m.strip(" '\"") for m in (match.group(2) or "'GET'").split(",") if m.strip()]
+        endpoint = match.group(3)
+        # GET and POST handlers for one URL may be separate functions; keep both
+        endpoints[endpoint] = {
+            "route": match.group(1),
+            "methods": methods,
+            "template": template.group(1) if template else None,
+        }
+    return endpoints
+
+def _find_routes_file(template_dir: str) -> Optional[str]:
+    for name in ("routes.py", "app.py"):
+        path = os.path.join(os.path.dirname(os.path.abspath(template_dir)), name)
+        if os.path.exists(path):
+            return path
+    return None
+
+def _terms(text: str) -> List[str]:
+    return [fold_plural(word) for word in _WORD.findall(text.lower().replace("_", " "))]
+
+def build_page_index(template_dir: str, routes_path: Optional[str] = None) -> dict:
+    """Precomputes a locator map per HTML page in template_dir, keyed by page name.
+
+    When a Flask routes module is found (routes.py / app.py next to the template
+    directory, or routes_path), each page records the route that renders it and
+    url_for() links in the maps are resolved to real paths.
+    """
+    routes_path = routes_path or _find_routes_file(template_dir)
+    endpoints = parse_flask_routes(routes_path) if routes_path else {}
+    routes_by_template = {}
+    for endpoint in endpoints.values():
+        if endpoint["template"]:
+            routes_by_template.setdefault(endpoint["template"], []).append(endpoint["route"])
+
+    def resolve_url_for(match):
+        endpoint = endpoints.get(match.group(1))
+        return endpoint["route"] if endpoint else match.group(0)
+
+    pages = {}
+    for path in sorted(glob.glob(os.path.join(template_dir, "**", "*.html"), recursive=True)):
+        name = os.path.relpath(path, template_dir).replace(os.sep, "/")
+        with open(path, encoding="utf-8") as f:
+            locator_map = _URL_FOR.sub(resolve_url_for, distill_html(f.read()))
+        routes = sorted(set(routes_by_template.get(name, [])))
+        pages[name] = {
+            "routes": routes,
+            "locator_map": locator_map,
+            "terms": dict(Counter(_terms(" ".join([name, *routes, locator_map])))),
+        }
+    return {"template_dir": os.path.abspath(template_dir), "pages": pages}
+
+def save_page_index(page_index: dict, path: str):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(page_index, f)
+    os.replace(tmp_path, path)
+
+def load_page_index(path: str) -> Optional[dict]:
+    if not os.path.exists(path):
+        return None
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+def select_pages(page_index: dict, query: str, max_pages: int = MAX_PAGES) -> List[str]:
+    """Ranks pages by idf-weighted term overlap with the query and returns the best names.
+
+    Page names and routes count double, so "cart" in a test case prefers cart.html
+    over every page that merely links to the cart.
+    """
+    pages = page_index["pages"]
+    query_terms = set(_terms(query))
+    if not pages or not query_terms:
+        return []
+
+    document_frequency = Counter(term for page in pages.values() for term in page["terms"])
+    scores = {}
+    for name, page in pages.items():
+        title_terms = set(_terms(" ".join([name, *page["routes"]])))
+        score = 0.0
+        for term in query_terms & set(page["terms"]):
+            idf = math.log(1 + len(pages) / document_frequency[term])
+            score += idf * (1 + math.log(page["terms"][term])) * (2 if term in title_terms else 1)
+        if score > 0:
+            scores[name] = score
+    return sorted(scores, key=scores.get, reverse=True)[:max_pages]
+
+def format_pages(page_index: dict, names: List[str]) -> str:
+    """Renders the locator maps of the selected pages for the prompt."""
+    sections = []
+    for name in names:
+        page = page_index["pages"][name]
+        routes = ", ".join(page["routes"]) or "no direct route"
+        sections.append(f"=== PAGE {name} (route: {routes}) ===\n{page['locator_map']}")
+    return "\n\n".join(sections)
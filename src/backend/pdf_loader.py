@@ -0,0 +1,46 @@
+from typing import Iterator, List, Optional, Tuple
+
+from langchain_core.document_loaders import BaseLoader
+from langchain_core.documents import Document
+from pypdf import PdfReader
+
+PDF_PAGES_PER_TASK = 16
+
+def pdf_page_ranges(file_path: str, pages_per_task: int = PDF_PAGES_PER_TASK) -> List[Optional[Tuple[int, int]]]:
+    """Splits a PDF into [start, stop) page ranges of pages_per_task pages, loaded as separate tasks.
+
+    Returns [None] (the whole file as one task) for short PDFs and for files that
+    can't be opened, so the load task itself reports the error.
+    """
+    try:
+        total = len(PdfReader(file_path).pages)
+    except Exception:
+        return [None]
+    if total <= pages_per_task:
+        return [None]
+    return [(start, min(start + pages_per_task, total)) for start in range(0, total, pages_per_task)]
+
+class PagedPDFLoader(BaseLoader):
+    """Loads a PDF as one Document per page, with 1-based `page` and `total_pages` metadata.
+
+    pages restricts loading to a [start, stop) range; iter_load_files loads the
+    ranges of a large PDF (see pdf_page_ranges) as separate tasks and yields each
+    one as it finishes. Pages are extracted one at a time by lazy_load(). Pages
+    without extractable text (e.g. scans) are skipped.
+    """
+
+    def __init__(self, file_path: str, pages: Optional[Tuple[int, int]] = None):
+        self.file_path = file_path
+        self.pages = pages
+
+    def lazy_load(self) -> Iterator[Document]:
+        reader = PdfReader(self.file_path)
+        total = len(reader.pages)
+        start, stop = self.pages or (0, total)
+        for number in range(start, min(stop, total)):
+            text = reader.pages[number].extract_text() or ""
+            if text.strip():
+                yield Document(
+                    page_content=text,
+                    metadata={"source": self.file_path, "page": number + 1, "total_pages": total},
+                )
@@ -1,7 +1,9 @@
+from functools import lru_cache
 from langchain_google_genai import ChatGoogleGenerativeAI
 
+@lru_cache(maxsize=8)
 def get_llm(api_key: str, model_name: str = "gemini-2.5-pro"):
-    """Initializes the Gemini LLM."""
+    """Initializes the Gemini LLM, once per (api_key, model_name) in this process."""
     return ChatGoogleGenerativeAI(
         model=model_name,
         google_api_key=api_key,
@@ -0,0 +1,75 @@
+import os
+import time
+import logging
+from functools import lru_cache
+from typing import List, NamedTuple
+
+from langchain_core.documents import Document
+
+RERANK_MODEL = "cross-encoder/ms-marco-MiniLM-L-6-v2"
+RERANK_CANDIDATES = 30
+RERANK_BATCH_SIZE = 16
+RERANK_BUDGET_MS = 300
+
+logger = logging.getLogger(__name__)
+
+class RerankConfig(NamedTuple):
+    """Settings of the optional cross-encoder reranking stage."""
+    enabled: bool = False
+    model_name: str = RERANK_MODEL
+    candidates: int = RERANK_CANDIDATES
+    batch_size: int = RERANK_BATCH_SIZE
+    budget_ms: float = RERANK_BUDGET_MS
+
+def default_rerank_config() -> RerankConfig:
+    """Builds the reranking settings from RERANK_* environment variables."""
+    return RerankConfig(
+        enabled=os.getenv("RERANK_ENABLED", "false").lower() in ("1", "true", "yes"),
+        model_name=os.getenv("RERANK_MODEL", RERANK_MODEL),
+        candidates=int(os.getenv("RERANK_CANDIDATES", str(RERANK_CANDIDATES))),
+        batch_size=int(os.getenv("RERANK_BATCH_SIZE", str(RERANK_BATCH_SIZE))),
+        budget_ms=float(os.getenv("RERANK_BUDGET_MS", str(RERANK_BUDGET_MS))),
+    )
+
+class RerankResult(NamedTuple):
+    """Top documents of a rerank; timed_out is set when the budget forced the vector order."""
+    docs: List[Document]
+    timed_out: bool
+    seconds: float
+
+@lru_cache(maxsize=None)
+def get_cross_encoder(model_name: str = RERANK_MODEL):
+    """Returns the cross-encoder on CPU, or None if sentence-transformers or the model is unavailable."""
+    try:
+        from sentence_transformers import CrossEncoder
+        return CrossEncoder(model_name, device="cpu")
+    except Exception as e:
+        logger.warning("Reranking disabled, could not load %s: %s", model_name, e)
+        return None
+
+def rerank_documents(query: str, docs: List[Document], top_n: int, config: RerankConfig = RerankConfig()) -> RerankResult:
+    """Scores (query, chunk) pairs with the cross-encoder and returns the best top_n.
+
+    Pairs are scored in batches of config.batch_size. If the time budget runs out
+    before every candidate is scored, the incoming (vector) order is kept, since a
+    partial ranking would favour whichever candidates happened to come first.
+    """
+    model = get_cross_encoder(config.model_name)
+    if model is None or len(docs) <= 1:
+        return RerankResult(docs[:top_n], False, 0.0)
+
+    # Model loading is a one-off cost and does not count against the budget
+    start = time.perf_counter()
+    pairs = [(query, doc.page_content) for doc in docs]
+    scores = []
+    for i in range(0, len(pairs), config.batch_size):
+        scores.extend(float(score) for score in model.predict(pairs[i:i + config.batch_size], batch_size=config.batch_size))
+        elapsed = time.perf_counter() - start
+        if elapsed * 1000 > config.budget_ms and len(scores) < len(pairs):
+            logger.info("Rerank budget of %.0f ms exceeded after %d/%d candidates; keeping vector order", config.budget_ms, len(scores), len(pairs))
+            return RerankResult(docs[:top_n], True, elapsed)
+
+    order = sorted(range(len(docs)), key=lambda i: scores[i], reverse=True)
+    elapsed = time.perf_counter() - start
+    logger.info("Reranked %d candidates in %.0f ms", len(docs), elapsed * 1000)
+    return RerankResult([docs[i] for i in order[:top_n]], False, elapsed)
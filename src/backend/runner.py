@@ -0,0 +1,330 @@
+"""Parallel runner for generated Selenium scripts with warm headless Chrome sessions.
+
+Each worker process starts a pool of headless Chrome sessions once and executes
+scripts in-process with webdriver.Chrome patched to lease a pooled session;
+driver.quit() hands the session back, which is reset (cookies, local and session
+storage cleared) instead of closed. Browser start-up is paid once per session
+rather than once per script.
+
+Usage (from src/):
+    python -m backend.runner ../generated_scripts --workers 4
+"""
+import io
+import os
+import sys
+import json
+import time
+import glob
+import queue
+import runpy
+import argparse
+import threading
+import traceback
+import multiprocessing
+from contextlib import redirect_stderr, redirect_stdout
+from typing import List, NamedTuple, Optional
+
+RUNNER_WORKERS = min(4, os.cpu_count() or 1)
+SESSIONS_PER_WORKER = 2
+SCREENSHOT_MODES = ("failures", "all", "none")
+REPORT_DIR = "selenium_runs"
+
+class RunnerConfig(NamedTuple):
+    """Settings of a runner invocation."""
+    workers: int = RUNNER_WORKERS
+    sessions_per_worker: int = SESSIONS_PER_WORKER
+    headless: bool = True
+    screenshots: str = "failures"
+    output_dir: str = REPORT_DIR
+
+class ScriptRun(NamedTuple):
+    """Outcome of one script: PASS, FAIL or NO RESULT (neither line printed), or ERROR."""
+    script: str
+    status: str
+    passes: List[str]
+    failures: List[str]
+    seconds: float
+    screenshots: List[str]
+    output: str
+    error: Optional[str]
+    worker: int
+
+class WorkerFailure(NamedTuple):
+    """Sent instead of results by a worker whose browsers could not start."""
+    worker: int
+    error: str
+
+def chrome_options(headless: bool = True):
+    from selenium import webdriver
+    options = webdriver.ChromeOptions()
+    if headless:
+        options.add_argument("--headless=new")
+    options.add_argument("--disable-gpu")
+    options.add_argument("--no-sandbox")
+    options.add_argument("--disable-dev-shm-usage")
+    options.add_argument("--window-size=1920,1080")
+    return options
+
+class PooledDriver:
+    """Proxy for a pooled WebDriver; quit() returns the session to the pool instead of closing it."""
+
+    def __init__(self, driver, pool: "DriverPool"):
+        self._driver = driver
+        self._pool = pool
+
+    def __getattr__(self, name):
+        return getattr(self._driver, name)
+
+    # Dunder lookups bypass __getattr__; needed for `with webdriver.Chrome() as driver:`
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.quit()
+
+    def quit(self):
+        self._pool.release(self)
+
+    def close(self):
+        if len(self._driver.window_handles) > 1:
+            self._driver.close()
+        else:
+            # Closing the last window would end the session; treat it like quit()
+            self._pool.release(self)
+
+class DriverPool:
+    """Warm Chrome sessions owned by one worker process."""
+
+    def __init__(self, size: int, headless: bool = True):
+        from selenium import webdriver
+        self.size = size
+        self.headless = headless
+        self._chrome = webdriver.Chrome  # the real class, before the runner patches it
+        self._idle = []
+        self._leased = []
+        self._lock = threading.Lock()
+        self.on_release = None  # callback(driver) run before a session is reset
+
+    def _start(self):
+        return self._chrome(options=chrome_options(self.headless))
+
+    def warm(self):
+        while len(self._idle) < self.size:
+            self._idle.append(self._start())
+
+    def acquire(self, *args, **kwargs) -> PooledDriver:
+        """Drop-in for webdriver.Chrome(...); the script's own options are ignored."""
+        with self._lock:
+            driver = self._idle.pop() if self._idle else None
+        if driver is None:
+            # The script wants more browsers than the pool holds (e.g. two users)
+            driver = self._start()
+        pooled = PooledDriver(driver, self)
+        with self._lock:
+            self._leased.append(pooled)
+        return pooled
+
+    def release(self, pooled: PooledDriver):
+        with self._lock:
+            if pooled not in self._leased:
+                return  # quit() called twice
+            self._leased.remove(pooled)
+        driver = pooled._driver
+        if self.on_release:
+            self.on_release(driver)
+        try:
+            self._reset(driver)
+        except Exception:
+            # Crashed or wedged session: replace it rather than hand it to the next script
+            self._discard(driver)
+            return
+        with self._lock:
+            if len(self._idle) < self.size:
+                self._idle.append(driver)
+                return
+        self._discard(driver)
+
+    def release_all(self):
+        """Returns sessions a script left open (no quit() in its finally)."""
+        for pooled in list(self._leased):
+            self.release(pooled)
+
+    @staticmethod
+    def _reset(driver):
+        if driver.current_url.startswith("http"):
+            # sessionStorage belongs to the tab, not the origin; CDP below doesn't reach it
+            driver.execute_script("window.sessionStorage.clear();")
+        # Extra tabs opened by the script
+        for handle in driver.window_handles[1:]:
+            driver.switch_to.window(handle)
+            driver.close()
+        driver.switch_to.window(driver.window_handles[0])
+        driver.get("about:blank")
+        # delete_all_cookies() only covers the current document's domain; clear every origin
+        driver.execute_cdp_cmd("Network.clearBrowserCookies", {})
+        driver.execute_cdp_cmd("Storage.clearDataForOrigin", {"origin": "*", "storageTypes": "all"})
+
+    @staticmethod
+    def _discard(driver):
+        try:
+            driver.quit()
+        except Exception:
+            pass
+
+    def close(self):
+        self.release_all()
+        for driver in self._idle:
+            self._discard(driver)
+        self._idle = []
+
+def _result_lines(output: str, marker: str) -> List[str]:
+    return [line.strip() for line in output.splitlines() if line.strip().startswith(marker)]
+
+def _run_script(path: str, pool: DriverPool, config: RunnerConfig, worker: int) -> ScriptRun:
+    """Executes one script as __main__ with stdout captured and pooled drivers."""
+    name = os.path.splitext(os.path.basename(path))[0]
+    output = io.StringIO()
+    screenshots = []
+    error = None
+
+    def capture(driver):
+        failed = "FAIL" in output.getvalue()
+        if config.screenshots == "all" or (config.screenshots == "failures" and failed):
+            screenshot = os.path.join(config.output_dir, "screenshots", f"{name}_{len(screenshots) + 1}.png")
+            try:
+                if driver.save_screenshot(screenshot):
+                    screenshots.append(screenshot)
+            except Exception:
+                pass
+
+    pool.on_release = capture
+    # Like `python script.py`, let the script import modules next to it (e.g. qa_fixtures)
+    script_dir = os.path.dirname(path)
+    sys.path.insert(0, script_dir)
+    start = time.perf_counter()
+    try:
+        with redirect_stdout(output), redirect_stderr(output):
+            runpy.run_path(path, run_name="__main__")
+    except SystemExit as e:
+        if e.code not in (None, 0):
+            error = f"SystemExit: {e.code}"
+    except BaseException as e:
+        error = f"{type(e).__name__}: {e}"
+        output.write(traceback.format_exc())
+    finally:
+        pool.release_all()
+        pool.on_release = None
+        sys.path.remove(script_dir)
+    seconds = time.perf_counter() - start
+
+    text = output.getvalue()
+    passes, failures = _result_lines(text, "PASS"), _result_lines(text, "FAIL")
+    if error and not failures:
+        status = "ERROR"
+    elif failures:
+        status = "FAIL"
+    elif passes:
+        status = "PASS"
+    else:
+        status = "NO RESULT"
+    return ScriptRun(path, status, passes, failures, seconds, screenshots, text, error, worker)
+
+def _worker(worker: int, config: RunnerConfig, tasks, results):
+    from selenium import webdriver
+    pool = DriverPool(config.sessions_per_worker, config.headless)
+    try:
+        try:
+            pool.warm()
+        except Exception as e:
+            # Chrome could not start here; leave the queue to the workers whose browsers did
+            results.put(WorkerFailure(worker, f"Worker {worker} failed: {type(e).__name__}: {e}"))
+            return
+        webdriver.Chrome = pool.acquire
+        while (task := tasks.get()) is not None:
+            results.put(_run_script(task, pool, config, worker))
+    finally:
+        pool.close()
+
+def run_scripts(script_paths: List[str], config: RunnerConfig = RunnerConfig()) -> List[ScriptRun]:
+    """Runs the scripts across config.workers processes and returns results in input order."""
+    os.makedirs(os.path.join(config.output_dir, "screenshots"), exist_ok=True)
+    workers = max(1, min(config.workers, len(script_paths)))
+    tasks, results = multiprocessing.Queue(), multiprocessing.Queue()
+    for path in script_paths:
+        tasks.put(os.path.abspath(path))
+    for _ in range(workers):
+        tasks.put(None)
+
+    processes = [multiprocessing.Process(target=_worker, args=(i, config, tasks, results)) for i in range(workers)]
+    for process in processes:
+        process.start()
+    runs, failures = {}, []
+    while len(runs) < len(script_paths):
+        try:
+            run = results.get(timeout=1)
+        except queue.Empty:
+            if any(process.is_alive() for process in processes):
+                continue
+            break  # every worker failed or died (e.g. a script called os._exit)
+        if isinstance(run, WorkerFailure):
+            failures.append(run.error)
+            print(run.error)
+            continue
+        runs[run.script] = run
+        print(f"[{len(runs)}/{len(script_paths)}] {run.status:<9} {run.seconds:6.1f}s  {os.path.basename(run.script)}")
+    for process in processes:
+        process.join()
+    error = "; ".join(failures) or "Worker exited before running the script"
+    return [
+        runs.get(os.path.abspath(path)) or ScriptRun(os.path.abspath(path), "ERROR", [], [], 0.0, [], "", error, -1)
+        for path in script_paths
+    ]
+
+def write_report(runs: List[ScriptRun], wall_seconds: float, output_dir: str = REPORT_DIR) -> str:
+    """Writes report.json (everything, including output) and report.md (summary table); returns the markdown path."""
+    os.makedirs(output_dir, exist_ok=True)
+    counts = {status: sum(run.status == status for run in runs) for status in ("PASS", "FAIL", "ERROR", "NO RESULT")}
+    summary = {"scripts": len(runs), "wall_seconds": round(wall_seconds, 2), "script_seconds": round(sum(run.seconds for run in runs), 2), **counts}
+    with open(os.path.join(output_dir, "report.json"), "w", encoding="utf-8") as f:
+        json.dump({"summary": summary, "runs": [run._asdict() for run in runs]}, f, indent=2)
+
+    lines = [
+        "# Selenium run report",
+        "",
+        ", ".join(f"{key}: {value}" for key, value in summary.items()),
+        "",
+        "| Script | Status | Seconds | Result | Screenshots |",
+        "|---|---|---|---|---|",
+    ]
+    for run in runs:
+        result = "; ".join(run.failures or run.passes) or (run.error or "")
+        shots = " ".join(os.path.relpath(shot, output_dir) for shot in run.screenshots)
+        lines.append(f"| {os.path.basename(run.script)} | {run.status} | {run.seconds:.1f} | {result.replace('|', '/')} | {shots} |")
+    path = os.path.join(output_dir, "report.md")
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("\n".join(lines) + "\n")
+    return path
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("scripts", help="Directory of generated scripts (*.py) or a single script")
+    parser.add_argument("--workers", type=int, default=RUNNER_WORKERS)
+    parser.add_argument("--sessions", type=int, default=SESSIONS_PER_WORKER, help="Warm Chrome sessions per worker")
+    parser.add_argument("--screenshots", choices=SCREENSHOT_MODES, default="failures")
+    parser.add_argument("--headed", action="store_true", help="Show the browsers")
+    parser.add_argument("--output", default=REPORT_DIR)
+    args = parser.parse_args()
+
+    paths = sorted(glob.glob(os.path.join(args.scripts, "*.py"))) if os.path.isdir(args.scripts) else [args.scripts]
+    if not paths:
+        sys.exit(f"No scripts found in {args.scripts}")
+    config = RunnerConfig(args.workers, args.sessions, not args.headed, args.screenshots, args.output)
+
+    start = time.perf_counter()
+    runs = run_scripts(paths, config)
+    report = write_report(runs, time.perf_counter() - start, args.output)
+    print(f"Report: {report}")
+    sys.exit(0 if all(run.status == "PASS" for run in runs) else 1)
+
+if __name__ == "__main__":
+    main()
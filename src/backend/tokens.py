@@ -0,0 +1,23 @@
+import math
+from functools import lru_cache
+
+# WordPiece tokenizer shipped with the local embedding model; a close enough proxy
+# for prompt sizes without calling the Gemini token counting API
+TOKENIZER_MODEL = "sentence-transformers/all-MiniLM-L6-v2"
+CHARS_PER_TOKEN = 4
+
+@lru_cache(maxsize=None)
+def get_tokenizer(model_name: str = TOKENIZER_MODEL):
+    """Returns the local tokenizer, or None if transformers or the model is unavailable."""
+    try:
+        from transformers import AutoTokenizer
+        return AutoTokenizer.from_pretrained(model_name)
+    except Exception:
+        return None
+
+def count_tokens(text: str) -> int:
+    """Counts tokens with the local tokenizer, falling back to a chars/4 estimate."""
+    tokenizer = get_tokenizer()
+    if tokenizer is None:
+        return math.ceil(len(text) / CHARS_PER_TOKEN)
+    return len(tokenizer.encode(text, add_special_tokens=False, verbose=False))
@@ -0,0 +1,24 @@
+from backend.bm25 import BM25Index, fold_plural, tokenize
+
+CHUNKS = [
+    ("a", "Apply coupon SAVE20 at checkout for 20% off"),
+    ("b", "Apply coupon SAVE10 at checkout for 10% off"),
+    ("c", "The cart page lists every item and its quantity"),
+]
+
+def test_search_reads_postings_from_sqlite(tmp_path):
+    BM25Index.build(iter(CHUNKS), str(tmp_path))
+    index = BM25Index.load(str(tmp_path))
+
+    assert index.total == 3
+    assert index.search("save20 coupons", k=3)[0][0] == "a"
+    assert [id_ for id_, _ in index.search("cart items", k=3)] == ["c"]
+    assert index.search("wishlist", k=3) == []
+
+def test_load_without_index(tmp_path):
+    assert BM25Index.load(str(tmp_path)) is None
+
+def test_tokenize_folds_plurals():
+    assert tokenize("The coupons and glass") == ["coupon", "glass"]
+    assert fold_plural("orders") == "order"
+    assert fold_plural("bus") == "bus"
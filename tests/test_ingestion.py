@@ -0,0 +1,133 @@
+import os
+import multiprocessing
+
+import faiss
+import pytest
+from langchain_core.documents import Document
+from langchain_core.embeddings import DeterministicFakeEmbedding
+
+from backend import ingestion
+from backend.faiss_index import IndexSpec, index_type_of
+
+@pytest.fixture
+def fake_embeddings(monkeypatch):
+    embeddings = DeterministicFakeEmbedding(size=32)
+    monkeypatch.setattr(ingestion, "get_embeddings", lambda *args, **kwargs: embeddings)
+    return embeddings
+
+def _documents(count: int):
+    return [
+        Document(page_content=f"Test case {n}: check the login form with user {n}", metadata={"source": f"case_{n}.txt"})
+        for n in range(count)
+    ]
+
+@pytest.mark.parametrize("index_type", ["flat", "hnsw", "ivf_flat", "ivf_pq"])
+def test_load_vector_db_with_mmap(tmp_path, fake_embeddings, index_type):
+    db_path = str(tmp_path / "faiss_db")
+    spec = IndexSpec(type=index_type, nlist=4, pq_m=8, pq_nbits=4)
+    ingestion.create_vector_db(_documents(300), db_path=db_path, index_spec=spec, chunking="recursive")
+
+    vector_db = ingestion.load_vector_db(db_path=db_path, mmap=True)
+
+    assert index_type_of(vector_db.index) == index_type
+    hits = vector_db.similarity_search("Test case 7: check the login form with user 7", k=3)
+    assert len(hits) == 3
+    assert all(hit.page_content.startswith("Test case") for hit in hits)
+
+def test_loaders_follow_the_chunking_argument(tmp_path, monkeypatch):
+    monkeypatch.setenv("CHUNKING_STRATEGY", "structured")
+    page = tmp_path / "checkout.html"
+    page.write_text("<html><body><h1>Checkout</h1><form id='pay'></form></body></html>", encoding="utf-8")
+
+    raw = ingestion.load_documents([str(page)])
+    text = ingestion.load_documents([str(page)], chunking="recursive")
+
+    assert "<form" in raw[0].page_content
+    assert "<form" not in text[0].page_content and "Checkout" in text[0].page_content
+
+def test_search_params_apply_to_one_caller_only(tmp_path, fake_embeddings):
+    db_path = str(tmp_path / "faiss_db")
+    ingestion.create_vector_db(_documents(300), db_path=db_path, index_spec=IndexSpec(type="ivf_flat", nlist=4, nprobe=2), chunking="recursive")
+
+    tuned = ingestion.load_vector_db(db_path=db_path, nprobe=4)
+    shared = ingestion.load_vector_db(db_path=db_path)
+
+    assert len(tuned.similarity_search("Test case 3", k=2)) == 2
+    assert faiss.extract_index_ivf(shared.index).nprobe == 2
+    assert tuned.docstore is shared.docstore
+    assert tuned.index_version != shared.index_version
+
+def test_incremental_build_retrains_once_the_corpus_outgrows_the_index(tmp_path, fake_embeddings):
+    db_path = str(tmp_path / "faiss_db")
+    spec = IndexSpec(type="ivf_pq", pq_m=8)
+    small = ingestion.create_vector_db(_documents(100), db_path=db_path, index_spec=spec, chunking="recursive")
+    assert index_type_of(small.index) == "flat"
+
+    grown = ingestion.create_vector_db(
+        _documents(600), db_path=db_path, incremental=True, index_spec=spec, chunking="recursive")
+
+    assert index_type_of(grown.index) == "ivf_pq"
+    assert faiss.extract_index_ivf(grown.index).nlist == 600 // 64
+    assert len(grown.similarity_search("Test case 450", k=3)) == 3
+
+class _FakePDFLoader:
+    def __init__(self, file_path, pages=None):
+        self.file_path, self.pages = file_path, pages
+
+    def lazy_load(self):
+        start, stop = self.pages or (0, 40)
+        if start >= 32:
+            raise ValueError("broken page")
+        for number in range(start, stop):
+            yield Document(page_content=f"page {number + 1}", metadata={"page": number + 1})
+
+def test_pdf_page_ranges_stream_one_at_a_time(tmp_path, monkeypatch):
+    monkeypatch.setattr(ingestion, "pdf_page_ranges", lambda path: [(0, 16), (16, 32), (32, 40)])
+    monkeypatch.setattr(ingestion, "PagedPDFLoader", _FakePDFLoader)
+    spec = str(tmp_path / "spec.pdf")
+
+    results = list(ingestion.iter_load_files([spec]))
+
+    assert [(len(r.documents), r.partial, r.error) for r in results] == [
+        (16, True, None), (16, True, None), (0, False, "ValueError: broken page")]
+    assert ingestion.load_files([spec])[0].error == "ValueError: broken page"
+
+def test_timed_out_worker_is_killed(tmp_path):
+    # Opening a FIFO with no writer blocks forever
+    hung = tmp_path / "hung.txt"
+    os.mkfifo(hung)
+    paths = [str(hung)]
+    for n in range(3):
+        (tmp_path / f"case_{n}.txt").write_text(f"case {n}", encoding="utf-8")
+        paths.append(str(tmp_path / f"case_{n}.txt"))
+
+    results = ingestion.load_files(paths, max_workers=2, timeout=1)
+
+    assert results[0].error == "Timed out after 1s"
+    assert [r.documents[0].page_content for r in results[1:]] == ["case 0", "case 1", "case 2"]
+    # Idle workers exit on shutdown; the one stuck on the FIFO only if it was killed
+    for child in multiprocessing.active_children():
+        child.join(timeout=5)
+    assert not multiprocessing.active_children()
+
+def test_incremental_build_updates_the_sqlite_stores_in_place(tmp_path, fake_embeddings):
+    documents = _documents(50)
+    ingestion.create_vector_db(documents, db_path=str(tmp_path / "incremental"), chunking="recursive")
+    documents[3] = Document(page_content="Test case 3: apply coupon SAVE20 at checkout", metadata={"source": "case_3.txt"})
+    del documents[10]
+
+    updated = ingestion.create_vector_db(
+        documents, db_path=str(tmp_path / "incremental"), incremental=True, chunking="recursive")
+    rebuilt = ingestion.create_vector_db(documents, db_path=str(tmp_path / "rebuilt"), chunking="recursive")
+
+    def texts(vector_db):
+        return sorted(vector_db.docstore.search(id_).page_content for id_ in vector_db.index_to_docstore_id.values())
+
+    def keyword_hits(vector_db, query):
+        return [vector_db.docstore.search(id_).page_content for id_, _ in vector_db.keyword_index.search(query, k=5)]
+
+    assert texts(updated) == texts(rebuilt)
+    assert (updated.keyword_index.total, updated.keyword_index.average_length) == (
+        rebuilt.keyword_index.total, rebuilt.keyword_index.average_length)
+    assert keyword_hits(updated, "coupon SAVE20") == keyword_hits(rebuilt, "coupon SAVE20")
+    assert keyword_hits(updated, "user 10") == keyword_hits(rebuilt, "user 10")
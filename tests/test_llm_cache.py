@@ -0,0 +1,83 @@
+import asyncio
+
+import pytest
+from langchain_core.language_models import FakeListChatModel
+from langchain_core.prompts import ChatPromptTemplate
+
+from backend import llm_cache
+from backend.llm_cache import LLMResponseCache, cached_llm, llm_cache_key, stream_llm
+
+PROMPT = ChatPromptTemplate.from_template("Write test cases for {feature}")
+
+@pytest.fixture
+def cache(tmp_path):
+    return LLMResponseCache(str(tmp_path / "llm.sqlite"), ttl_seconds=60, max_entries=2)
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1_000_000.0]
+    monkeypatch.setattr(llm_cache.time, "time", lambda: now[0])
+    return now
+
+def test_hit_and_miss(cache):
+    assert cache.get("k") is None
+    cache.put("k", "answer")
+    assert cache.get("k") == "answer"
+    assert (cache.hits, cache.misses) == (1, 1)
+
+def test_entries_expire_after_ttl(cache, clock):
+    cache.put("k", "answer")
+    clock[0] += 59
+    assert cache.get("k") == "answer"
+    clock[0] += 2
+    assert cache.get("k") is None
+
+def test_least_recently_used_entry_is_evicted(cache, clock):
+    cache.put("a", "1")
+    clock[0] += 1
+    cache.put("b", "2")
+    clock[0] += 1
+    cache.get("a")
+    clock[0] += 1
+    cache.put("c", "3")
+    assert cache.get("b") is None
+    assert cache.get("a") == "1" and cache.get("c") == "3"
+
+def test_key_covers_model_temperature_and_prompt():
+    llm = FakeListChatModel(responses=["x"])
+    login, cart = PROMPT.invoke({"feature": "login"}), PROMPT.invoke({"feature": "cart"})
+    assert llm_cache_key(llm, login) == llm_cache_key(llm, PROMPT.invoke({"feature": "login"}))
+    assert llm_cache_key(llm, login) != llm_cache_key(llm, cart)
+    assert LLMResponseCache.make_key("m", 0.0, "p") != LLMResponseCache.make_key("m", 0.7, "p")
+    assert LLMResponseCache.make_key("m", 0.0, "p") != LLMResponseCache.make_key("n", 0.0, "p")
+
+def test_cached_llm_answers_repeats_from_the_cache(cache):
+    chain = PROMPT | cached_llm(FakeListChatModel(responses=["first", "second"]), cache)
+
+    assert chain.invoke({"feature": "login"}).content == "first"
+    assert chain.invoke({"feature": "login"}).content == "first"
+    assert asyncio.run(chain.ainvoke({"feature": "login"})).content == "first"
+    assert "".join(chunk.content for chunk in chain.stream({"feature": "login"})) == "first"
+    assert chain.invoke({"feature": "cart"}).content == "second"
+    assert cache.misses == 2
+
+def test_cached_llm_disabled_calls_the_model(cache):
+    chain = PROMPT | cached_llm(FakeListChatModel(responses=["first", "second"]), cache, enabled=False)
+    assert [chain.invoke({"feature": "login"}).content for _ in range(2)] == ["first", "second"]
+
+def test_stream_llm_caches_the_finished_stream(cache):
+    llm = FakeListChatModel(responses=["streamed answer"])
+    prompt_value = PROMPT.invoke({"feature": "login"})
+
+    tokens = list(stream_llm(llm, prompt_value, cache))
+    assert len(tokens) > 1 and "".join(tokens) == "streamed answer"
+    assert list(stream_llm(llm, prompt_value, cache)) == ["streamed answer"]
+
+def test_interrupted_stream_is_not_cached(cache):
+    llm = FakeListChatModel(responses=["streamed answer"])
+    prompt_value = PROMPT.invoke({"feature": "login"})
+
+    stream = stream_llm(llm, prompt_value, cache)
+    next(stream)
+    stream.close()
+    assert cache.get(llm_cache_key(llm, prompt_value)) is None